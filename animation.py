@@ -1,11 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.animation import FuncAnimation, HTMLWriter
+from matplotlib.animation import FuncAnimation
 from mechanism import Mechanism
-import streamlit as st
 
-def animate_mechanism(mechanism: Mechanism, show_length_error=False, show_stab_lengths=False, show_stab_angles=False):
+def create_animation_scene(mechanism: Mechanism, positions_over_time, show_length_error=False, show_stab_lengths=False, show_stab_angles=False):
+    # Alle Artists werden einmal angelegt und pro Frame nur noch verschoben bzw. neu beschriftet
     fig, ax = plt.subplots()
 
     all_x = [g.x for g in mechanism.gelenke]
@@ -34,102 +33,106 @@ def animate_mechanism(mechanism: Mechanism, show_length_error=False, show_stab_l
     
     gelenk_points, = ax.plot([], [], 'ro')
     stab_plot, = ax.plot([], [], 'k-', lw=2)
-    traj_plots = {i: ax.plot([], [], 'g-', lw=2)[0] for i, gelenk in enumerate(mechanism.gelenke) if gelenk.is_tracked}
-    text_annotations = []
+    tracked = [i for i, gelenk in enumerate(mechanism.gelenke) if gelenk.is_tracked]
+    traj_plots = {i: ax.plot([], [], 'g-', lw=2)[0] for i in tracked}
     
+    # Winkel-Tripel (Nachbar, Gelenk, Nachbar) einmalig aus der Topologie bestimmen
+    nachbarn = [[] for _ in mechanism.gelenke]
+    for i, j in zip(mechanism.i_idx, mechanism.j_idx):
+        nachbarn[i].append(j)
+        nachbarn[j].append(i)
+    winkel_tripel = [(a, k, b) for k, n in enumerate(nachbarn) for a, b in zip(n[:-1], n[1:])]
+    winkel_tripel = np.array(winkel_tripel, dtype=int).reshape(-1, 3)
+
     def calculate_length_error(mechanism, optimized_positions):
-        current_lengths = mechanism.verbindungs_matrix @ optimized_positions.flatten()
-        current_lengths = np.linalg.norm(current_lengths.reshape(-1, 2), axis=1)
+        current_lengths = mechanism.berechnet_laengen(optimized_positions)
         length_errors = (current_lengths - mechanism.start_laengen) / mechanism.start_laengen * 100
         return length_errors
 
     def calculate_stab_lengths(positions, staebe):
-        lengths = []
-        for stab in staebe:
-            p1, p2 = positions[mechanism.gelenke.index(stab.gelenk1)], positions[mechanism.gelenke.index(stab.gelenk2)]
-            length = np.linalg.norm(np.array(p2) - np.array(p1))
-            lengths.append(length)
-        return lengths
+        return mechanism.berechnet_laengen(np.asarray(positions))
 
     def calculate_stab_angles(positions, staebe):
-        angles = []
-        for gelenk in mechanism.gelenke:
-            connected_stabs = [stab for stab in staebe if gelenk in [stab.gelenk1, stab.gelenk2]]
-            if len(connected_stabs) < 2:
-                continue
-
-            for i in range(len(connected_stabs) - 1):
-                stab1, stab2 = connected_stabs[i], connected_stabs[i + 1]
-                p1 = np.array(positions[mechanism.gelenke.index(stab1.gelenk1 if stab1.gelenk1 != gelenk else stab1.gelenk2)])
-                p2 = np.array(positions[mechanism.gelenke.index(gelenk)])
-                p3 = np.array(positions[mechanism.gelenke.index(stab2.gelenk1 if stab2.gelenk1 != gelenk else stab2.gelenk2)])
-
-                v1 = p1 - p2
-                v2 = p3 - p2
-
-                if np.linalg.norm(v1) == 0 or np.linalg.norm(v2) == 0:
-                    angle = 0
-                else:
-                    cos_theta = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                    angle = np.arccos(np.clip(cos_theta, -1.0, 1.0)) * (180 / np.pi)
+        positions = np.asarray(positions)
+        v1 = positions[winkel_tripel[:, 0]] - positions[winkel_tripel[:, 1]]
+        v2 = positions[winkel_tripel[:, 2]] - positions[winkel_tripel[:, 1]]
+        norm = np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1)
+        cos_theta = np.einsum('ij,ij->i', v1, v2) / np.where(norm == 0, 1.0, norm)
+        winkel = np.where(norm == 0, 0.0, np.degrees(np.arccos(np.clip(cos_theta, -1.0, 1.0))))
 
-                angles.append((gelenk, angle, p2[0], p2[1]))  
+        angles = []
+        for (_, k, _), angle in zip(winkel_tripel, winkel):
+            angles.append((mechanism.gelenke[k], angle, positions[k, 0], positions[k, 1]))
         return angles
-    
-    def update(frame):
-        theta = np.linspace(0, 2 * np.pi, 50)[frame]
-        optimized_positions = mechanism.update_positions(theta)
-        gelenk_points.set_data(optimized_positions[:, 0], optimized_positions[:, 1])
 
-        stab_x, stab_y = [], []
-        length_errors = calculate_length_error(mechanism, optimized_positions)
+    num_staebe = len(mechanism.staebe)
+    error_texts = [ax.text(0, 0, "", color='red', fontsize=8, ha='center') for _ in range(num_staebe)] if show_length_error else []
+    length_texts = [ax.text(0, 0, "", color='blue', fontsize=8, ha='center') for _ in range(num_staebe)] if show_stab_lengths else []
+    angle_texts = [ax.text(0, 0, "", color='green', fontsize=8, ha='center') for _ in range(len(winkel_tripel))] if show_stab_angles else []
+    animated_artists = [gelenk_points, stab_plot, *traj_plots.values(), *error_texts, *length_texts, *angle_texts]
+    for artist in animated_artists:
+        artist.set_animated(True)
 
-        for text in text_annotations:
-            text.remove()
-        text_annotations.clear()
+    # Stablinien als ein Linienzug mit NaN-Trennern, Trajektorien direkt aus dem vorab gelösten Array
+    stab_buffer = np.full((num_staebe, 3, 2), np.nan)
+    traj_buffer = np.asarray(positions_over_time)[:, tracked]
+
+    def update(frame):
+        optimized_positions = positions_over_time[frame]
+        gelenk_points.set_data(optimized_positions[:, 0], optimized_positions[:, 1])
 
-        for i, stab in enumerate(mechanism.staebe):
-            p1, p2 = optimized_positions[mechanism.gelenke.index(stab.gelenk1)], optimized_positions[mechanism.gelenke.index(stab.gelenk2)]
-            stab_x.extend([p1[0], p2[0], None])
-            stab_y.extend([p1[1], p2[1], None])
+        p1, p2 = optimized_positions[mechanism.i_idx], optimized_positions[mechanism.j_idx]
+        stab_buffer[:, 0], stab_buffer[:, 1] = p1, p2
+        stab_plot.set_data(stab_buffer[:, :, 0].ravel(), stab_buffer[:, :, 1].ravel())
+        mid = (p1 + p2) / 2
 
-            if show_length_error:
-                mid_x, mid_y = (p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2
-                text = ax.text(mid_x, mid_y, f"{length_errors[i]:.2f}%", color='red', fontsize=8, ha='center')
-                text_annotations.append(text)
+        if show_length_error:
+            length_errors = calculate_length_error(mechanism, optimized_positions)
+            for text, (mid_x, mid_y), error in zip(error_texts, mid, length_errors):
+                text.set_position((mid_x, mid_y))
+                text.set_text(f"{error:.2f}%")
 
-            if show_stab_lengths:
-                mid_x, mid_y = (p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2
-                text = ax.text(mid_x, mid_y, f"{calculate_stab_lengths(optimized_positions, mechanism.staebe)[i]:.2f}", 
-                            color='blue', fontsize=8, ha='center')
-                text_annotations.append(text)
+        if show_stab_lengths:
+            stab_lengths = calculate_stab_lengths(optimized_positions, mechanism.staebe)
+            for text, (mid_x, mid_y), length in zip(length_texts, mid, stab_lengths):
+                text.set_position((mid_x, mid_y))
+                text.set_text(f"{length:.2f}")
 
-        stab_plot.set_data(stab_x, stab_y)
-        
-        for i, gelenk in enumerate(mechanism.gelenke):
-            if gelenk.is_tracked:
-                traj_x, traj_y = traj_plots[i].get_data()
-                traj_plots[i].set_data(np.append(traj_x, optimized_positions[i, 0]), np.append(traj_y, optimized_positions[i, 1]))
+        for k, i in enumerate(tracked):
+            traj_plots[i].set_data(traj_buffer[:frame + 1, k, 0], traj_buffer[:frame + 1, k, 1])
 
         if show_stab_angles:
             angles = calculate_stab_angles(optimized_positions, mechanism.staebe)
-            for idx, (gelenk, angle, mid_x, mid_y) in enumerate(angles):
+            for idx, (text, (gelenk, angle, mid_x, mid_y)) in enumerate(zip(angle_texts, angles)):
                 offset_x = 1.7 * np.cos(np.deg2rad(angle))
                 offset_y = 1.7 * np.sin(np.deg2rad(angle))
                 if idx % 2 == 0:
-                    text = ax.text(mid_x + offset_x, mid_y + offset_y, f"{angle:.1f}°", color='green', fontsize=8, ha='center')
+                    text.set_position((mid_x + offset_x, mid_y + offset_y))
                 else:
-                    text = ax.text(mid_x - offset_x, mid_y - offset_y, f"{angle:.1f}°", color='green', fontsize=8, ha='center')
-                text_annotations.append(text)
+                    text.set_position((mid_x - offset_x, mid_y - offset_y))
+                text.set_text(f"{angle:.1f}°")
 
-        return gelenk_points, stab_plot, *traj_plots.values()
-    
-    ani = FuncAnimation(fig, update, frames=50, interval=100)
-    html_writer = HTMLWriter()
+        return animated_artists
+
+    return fig, update
+
+def frame_positionen(mechanism: Mechanism, num_frames=50, show_length_error=False):
+    # Für die Bewegung genügt die interpolierte Tabelle; der angezeigte Längenfehler wäre dort aber Interpolationsfehler,
+    # deshalb werden die Frame-Winkel dann gelöst (geschlossen bzw. von der Tabelle aus nachiteriert)
+    thetas = np.linspace(0, 2 * np.pi, num_frames)
+    if show_length_error:
+        return mechanism.solve_angles(thetas)
+    return mechanism.positions_at(thetas)
+
+def animate_mechanism(mechanism: Mechanism, show_length_error=False, show_stab_lengths=False, show_stab_angles=False):
+    positions_over_time = frame_positionen(mechanism, 50, show_length_error)
+    fig, update = create_animation_scene(mechanism, positions_over_time, show_length_error, show_stab_lengths, show_stab_angles)
+
+    ani = FuncAnimation(fig, update, frames=len(positions_over_time), interval=100, blit=True)
     anim_html = ani.to_jshtml()
     return anim_html, ani
 
-def visualize_mechanism(gelenke, staebe, radius):
+def create_preview_figure(gelenke, staebe, radius):
     fig, ax = plt.subplots(figsize=(5, 5))  
     ax.set_aspect('equal')
     ax.set_title("Mechanismus Vorschau")
@@ -163,4 +166,9 @@ def visualize_mechanism(gelenke, staebe, radius):
         circle = plt.Circle((rotierendes_gelenk.x, rotierendes_gelenk.y), radius, color='b', fill=False, linestyle='dashed')
         ax.add_patch(circle)
 
-    st.pyplot(fig)
\ No newline at end of file
+    return fig
+
+def visualize_mechanism(gelenke, staebe, radius):
+    # Streamlit erst hier laden, damit animation.py auch ohne Oberfläche importierbar bleibt
+    import streamlit as st
+    st.pyplot(create_preview_figure(gelenke, staebe, radius))
\ No newline at end of file
@@ -0,0 +1,272 @@
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from mechanism import Mechanism, Gelenk, Stab
+
+# Referenzgestänge: Geometrien sind fest vorgegeben, damit Messungen zwischen Läufen vergleichbar bleiben
+
+def kreisschnitt(p1, r1, p2, r2, vorzeichen):
+    p1, p2 = np.asarray(p1, dtype=float), np.asarray(p2, dtype=float)
+    abstand = np.linalg.norm(p2 - p1)
+    entlang = (r1 ** 2 - r2 ** 2 + abstand ** 2) / (2 * abstand)
+    hoehe = np.sqrt(max(r1 ** 2 - entlang ** 2, 0.0))
+    richtung = (p2 - p1) / abstand
+    return p1 + entlang * richtung + vorzeichen * hoehe * np.array([-richtung[1], richtung[0]])
+
+def viergelenk():
+    gelenke = [Gelenk(0, 0, True), Gelenk(30, 0, is_rotating=True), Gelenk(15, 30, is_tracked=True)]
+    staebe = [Stab(gelenke[1], gelenke[2]), Stab(gelenke[2], gelenke[0])]
+    return gelenke, staebe, 8
+
+def jansen():
+    # Theo-Jansen-Bein (Strandbeest) mit den klassischen Stablängen
+    kurbel, lager = np.array([0.0, 0.0]), np.array([-38.0, -7.8])
+    c = kreisschnitt(kurbel, 50, lager, 41.5, 1)
+    d = kreisschnitt(lager, 55.8, c, 40.1, -1)
+    e = kreisschnitt(kurbel, 61.9, lager, 39.3, 1)
+    f = kreisschnitt(d, 39.4, e, 36.7, 1)
+    g = kreisschnitt(f, 65.7, e, 49, 1)
+    punkte = [lager, kurbel, c, d, e, f, g]
+    gelenke = [Gelenk(p[0], p[1], i == 0, i == 1, i == 6) for i, p in enumerate(punkte)]
+    paare = [(1, 2), (0, 2), (0, 3), (2, 3), (1, 4), (0, 4), (3, 5), (4, 5), (5, 6), (4, 6)]
+    return gelenke, [Stab(gelenke[a], gelenke[b]) for a, b in paare], 15
+
+def kette(num_gelenke):
+    # Synthetische Kette aus Dreiecken: jedes weitere Gelenk hängt an seinen zwei Vorgängern
+    punkte = [(0.0, 0.0), (-12.0, 4.0)] + [(5.0 * k, 8.0 * (k % 2)) for k in range(1, num_gelenke - 1)]
+    gelenke = [Gelenk(x, y, i == 0, i == 1, i == num_gelenke - 1) for i, (x, y) in enumerate(punkte)]
+    staebe = [Stab(gelenke[1], gelenke[2]), Stab(gelenke[0], gelenke[2]), Stab(gelenke[0], gelenke[3]), Stab(gelenke[2], gelenke[3])]
+    staebe += [Stab(gelenke[k - 1], gelenke[k]) for k in range(4, num_gelenke)]
+    staebe += [Stab(gelenke[k - 2], gelenke[k]) for k in range(4, num_gelenke)]
+    return gelenke, staebe, 2
+
+REFERENZEN = {
+    "viergelenk": viergelenk,
+    "jansen": jansen,
+}
+
+def referenz(name):
+    if name.startswith("kette"):
+        return kette(int(name[len("kette"):]))
+    return REFERENZEN[name]()
+
+def mechanismus(name, iterativ=False):
+    gelenke, staebe, radius = referenz(name)
+    mechanism = Mechanism(gelenke, staebe, radius)
+    if iterativ:
+        # Geschlossene Dyaden-Lösung abschalten, damit der Levenberg-Marquardt-Pfad gemessen wird
+        mechanism.dyaden = None
+    return mechanism
+
+def messen(funktion, vorbereitung=None, wiederholungen=5, min_zeit=0.2):
+    # Zeiten ohne Tracing (Median und Minimum), danach ein Lauf unter tracemalloc für Speicher und Allokationen
+    zeiten = []
+    gesamt = 0.0
+    while len(zeiten) < wiederholungen or (gesamt < min_zeit and len(zeiten) < 50 * wiederholungen):
+        argument = vorbereitung() if vorbereitung else None
+        gc.collect()
+        start = time.perf_counter()
+        funktion(argument)
+        zeiten.append(time.perf_counter() - start)
+        gesamt += zeiten[-1]
+
+    argument = vorbereitung() if vorbereitung else None
+    gc.collect()
+    bloecke = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        funktion(argument)
+        netto, spitze = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "zeit_median": statistics.median(zeiten),
+        "zeit_min": min(zeiten),
+        "wiederholungen": len(zeiten),
+        "speicher_spitze": spitze,
+        "speicher_netto": netto,
+        "bloecke_netto": sys.getallocatedblocks() - bloecke,
+    }
+
+def bench_konstruktion(name, aufloesung, iterativ):
+    gelenke, staebe, radius = referenz(name)
+    return messen(lambda _: Mechanism(gelenke, staebe, radius))
+
+def bench_trajektorie(name, aufloesung, iterativ):
+    # Konstruktion plus Lösen der vollständigen Tabelle (früher Teil von Mechanism.__init__)
+    return messen(lambda m: m.trajectory_table(aufloesung), lambda: mechanismus(name, iterativ))
+
+def bench_update_positions(name, aufloesung, iterativ):
+    mechanism = mechanismus(name, iterativ)
+    thetas = np.linspace(0, 2 * np.pi, aufloesung)
+
+    def lauf(_):
+        vorher = None
+        for theta in thetas:
+            vorher = mechanism.update_positions(theta, vorher)
+    return messen(lauf, wiederholungen=3)
+
+def bench_solve_angles(name, aufloesung, iterativ):
+    mechanism = mechanismus(name, iterativ)
+    mechanism.trajectory_table()
+    thetas = np.linspace(0, 2 * np.pi, aufloesung)
+    return messen(lambda _: mechanism.solve_angles(thetas))
+
+def bench_animation(name, aufloesung, iterativ):
+    from animation import animate_mechanism
+
+    def lauf(mechanism):
+        ani = animate_mechanism(mechanism)[1]
+        plt.close(ani._fig)
+    return messen(lauf, lambda: mechanismus(name, iterativ), wiederholungen=1, min_zeit=0)
+
+def bench_gif(name, aufloesung, iterativ):
+    from export import mechanism_animation_bytes
+    return messen(lambda m: mechanism_animation_bytes(m, "gif", num_frames=50), lambda: mechanismus(name, iterativ), wiederholungen=1, min_zeit=0)
+
+def bench_csv(name, aufloesung, iterativ):
+    from trajectory_export import schreibe_trajektorie
+    mechanism = mechanismus(name, iterativ)
+    mechanism.trajectory_table()
+    return messen(lambda _: schreibe_trajektorie(io.BytesIO(), mechanism, "csv", aufloesung, False), wiederholungen=3)
+
+def bench_db(name, aufloesung, iterativ):
+    import database
+    gelenke, staebe, radius = referenz(name)
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        alte_pfade = database.DB_PATH, database.TINYDB_PATH
+        database.DB_PATH = os.path.join(verzeichnis, "bench.sqlite")
+        database.TINYDB_PATH = os.path.join(verzeichnis, "fehlt.json")
+        database._connection = None
+        try:
+            speichern = messen(lambda _: database.save_mechanism_to_db(name, gelenke, staebe, radius))
+
+            def laden(_):
+                database.invalidate_cache()
+                database.load_mechanism_from_db(name)
+            laden_kalt = messen(laden)
+            laden_warm = messen(lambda _: database.load_mechanism_from_db(name))
+        finally:
+            database._connection.close()
+            database._connection = None
+            database.DB_PATH, database.TINYDB_PATH = alte_pfade
+    return {"speichern": speichern, "laden": laden_kalt, "laden_cache": laden_warm}
+
+BENCHMARKS = {
+    "konstruktion": bench_konstruktion,
+    "trajektorie": bench_trajektorie,
+    "update_positions": bench_update_positions,
+    "solve_angles": bench_solve_angles,
+    "animation": bench_animation,
+    "gif": bench_gif,
+    "csv": bench_csv,
+    "db": bench_db,
+}
+
+def plan(schnell=False):
+    # (Benchmark, Mechanismus, Winkelauflösung, iterativ); Skalierung über Gelenkanzahl und Winkelauflösung
+    ketten = [8, 16, 32] if schnell else [8, 16, 32, 64, 128]
+    aufloesungen = [72, 720] if schnell else [72, 360, 1440, 5760]
+    referenzen = ["viergelenk", "jansen"]
+    faelle = []
+    for name in referenzen + [f"kette{n}" for n in ketten]:
+        faelle.append(("konstruktion", name, 72, False))
+        faelle.append(("db", name, 72, False))
+        for iterativ in (False, True):
+            faelle.append(("trajektorie", name, 72, iterativ))
+            faelle.append(("update_positions", name, 72, iterativ))
+    for name in referenzen + ["kette32"]:
+        for aufloesung in aufloesungen:
+            for iterativ in (False, True):
+                faelle.append(("solve_angles", name, aufloesung, iterativ))
+            faelle.append(("csv", name, aufloesung * 10, False))
+    for name in referenzen:
+        faelle.append(("animation", name, 50, False))
+        faelle.append(("gif", name, 50, False))
+    return faelle
+
+def ausfuehren(faelle, nur=None, ausgabe=print):
+    ergebnisse = []
+    for benchmark, name, aufloesung, iterativ in faelle:
+        if nur and nur not in benchmark:
+            continue
+        messung = BENCHMARKS[benchmark](name, aufloesung, iterativ)
+        teilmessungen = messung.items() if benchmark == "db" else [(None, messung)]
+        for teil, werte in teilmessungen:
+            eintrag = {
+                "benchmark": f"{benchmark}.{teil}" if teil else benchmark,
+                "mechanismus": name,
+                "gelenke": len(referenz(name)[0]),
+                "aufloesung": aufloesung,
+                "verfahren": "iterativ" if iterativ else "standard",
+                **werte,
+            }
+            ergebnisse.append(eintrag)
+            ausgabe(f"{eintrag['benchmark']:<22} {name:<11} n={eintrag['gelenke']:<4} winkel={aufloesung:<6} {eintrag['verfahren']:<9} "
+                    f"{werte['zeit_median'] * 1000:10.3f} ms  spitze {werte['speicher_spitze'] / 1024:10.1f} KiB  bloecke {werte['bloecke_netto']}")
+    return ergebnisse
+
+def schluessel(eintrag):
+    return (eintrag["benchmark"], eintrag["mechanismus"], eintrag["aufloesung"], eintrag["verfahren"])
+
+def vergleichen(ergebnisse, basis, toleranz=0.25):
+    # Verlangsamungen gegenüber einer früheren JSON-Ausgabe melden (Median, relative Toleranz)
+    alt = {schluessel(e): e for e in basis["ergebnisse"]}
+    regressionen = []
+    for eintrag in ergebnisse:
+        vorher = alt.get(schluessel(eintrag))
+        if vorher and eintrag["zeit_median"] > vorher["zeit_median"] * (1 + toleranz):
+            regressionen.append((eintrag, vorher["zeit_median"]))
+    return regressionen
+
+def umgebung():
+    import scipy
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "matplotlib": matplotlib.__version__,
+        "plattform": platform.platform(),
+        "prozessor": platform.processor(),
+        "zeitpunkt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für Solver, Animation und Export")
+    parser.add_argument("--schnell", action="store_true", help="kleinerer Plan für schnelle Durchläufe")
+    parser.add_argument("--nur", help="nur Benchmarks, deren Name diesen Text enthält")
+    parser.add_argument("--ausgabe", help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--vergleich", help="JSON einer früheren Messung, gegen die Verlangsamungen geprüft werden")
+    parser.add_argument("--toleranz", type=float, default=0.25, help="erlaubte relative Verlangsamung (Standard 0.25)")
+    args = parser.parse_args(argv)
+
+    ergebnisse = ausfuehren(plan(args.schnell), args.nur)
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="utf-8") as f:
+            json.dump({"umgebung": umgebung(), "ergebnisse": ergebnisse}, f, indent=4)
+
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            regressionen = vergleichen(ergebnisse, json.load(f), args.toleranz)
+        for eintrag, vorher in regressionen:
+            print(f"LANGSAMER: {eintrag['benchmark']} {eintrag['mechanismus']} winkel={eintrag['aufloesung']} {eintrag['verfahren']}: "
+                  f"{vorher * 1000:.3f} ms -> {eintrag['zeit_median'] * 1000:.3f} ms")
+        return 1 if regressionen else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
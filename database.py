@@ -1,39 +1,161 @@
-from tinydb import TinyDB, Query
+import json
+import os
+import sqlite3
+import threading
 from mechanism import Mechanism, Gelenk, Stab
+from result_cache import standard_cache
 
-db = TinyDB("mechanism_db.json")
-mechanisms_table = db.table("mechanisms")
+DB_PATH = "mechanism_db.sqlite"
+TINYDB_PATH = "mechanism_db.json"
+
+_lock = threading.RLock()
+_connection = None
+_connection_pid = None
+_cache = {"data_version": None, "names": None, "records": {}}
+
+def get_connection():
+    # Eine gemeinsame Verbindung pro Prozess (WAL erlaubt parallele Leser neben einem Schreiber)
+    global _connection, _connection_pid
+    with _lock:
+        if _connection is None or _connection_pid != os.getpid():
+            _connection = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, timeout=30)
+            _connection_pid = os.getpid()
+            _connection.execute("PRAGMA journal_mode=WAL")
+            _connection.execute("PRAGMA synchronous=NORMAL")
+            _connection.execute(
+                "CREATE TABLE IF NOT EXISTS mechanisms ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "name TEXT NOT NULL UNIQUE, "
+                "revision INTEGER NOT NULL DEFAULT 1, "
+                "data TEXT NOT NULL)"
+            )
+            migrate_tinydb(_connection)
+            invalidate_cache()
+        return _connection
+
+def migrate_tinydb(connection):
+    # Bestehende TinyDB-Datei einmalig übernehmen, solange die SQLite-Tabelle noch leer ist
+    if not os.path.exists(TINYDB_PATH) or connection.execute("SELECT 1 FROM mechanisms LIMIT 1").fetchone():
+        return
+    try:
+        with open(TINYDB_PATH, encoding="utf-8") as f:
+            documents = json.load(f).get("mechanisms", {})
+    except (OSError, ValueError):
+        return
+    with connection:
+        for _, record in sorted(documents.items(), key=lambda item: int(item[0])):
+            connection.execute(
+                "INSERT OR IGNORE INTO mechanisms (name, data) VALUES (?, ?)",
+                (record["name"], json.dumps(record))
+            )
+
+def invalidate_cache():
+    _cache["names"] = None
+    _cache["records"].clear()
+
+def _check_cache(connection):
+    # data_version ändert sich, sobald eine andere Verbindung (z. B. eine andere Sitzung oder ein Prozess) schreibt
+    data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+    if data_version != _cache["data_version"]:
+        _cache["data_version"] = data_version
+        invalidate_cache()
+
+def list_mechanism_names():
+    with _lock:
+        connection = get_connection()
+        _check_cache(connection)
+        if _cache["names"] is None:
+            _cache["names"] = [row[0] for row in connection.execute("SELECT name FROM mechanisms ORDER BY id")]
+        return list(_cache["names"])
+
+def get_mechanism_record(name):
+    with _lock:
+        connection = get_connection()
+        _check_cache(connection)
+        if name not in _cache["records"]:
+            # Nur vorhandene Datensätze cachen; Fehlschläge (z. B. jeder getippte Name im Erstellung-Tab) ließen den Cache
+            # sonst unbegrenzt wachsen
+            row = connection.execute("SELECT id, revision, data FROM mechanisms WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[2])
+            record["id"], record["revision"] = row[0], row[1]
+            _cache["records"][name] = record
+        return _cache["records"][name]
+
+def mechanism_exists(name):
+    return get_mechanism_record(name) is not None
 
 def save_mechanism_to_db(name, gelenke, staebe, radius):
-    mechanisms_table.insert({
+    gelenk_indices = {g: i for i, g in enumerate(gelenke)}
+    record = {
         "name": name,
-        "gelenke": [{"x": g.x, "y": g.y, "is_static": g.is_static, "is_rotating": g.is_rotating, "is_tracked": g.is_tracked} for g in gelenke],
-        "staebe": [{"gelenk1": gelenke.index(s.gelenk1), "gelenk2": gelenke.index(s.gelenk2)} for s in staebe],
-        "radius": radius
-    })
+        "gelenke": [{"x": g.x, "y": g.y, "is_static": bool(g.is_static), "is_rotating": bool(g.is_rotating), "is_tracked": bool(g.is_tracked)} for g in gelenke],
+        "staebe": [{"gelenk1": gelenk_indices[s.gelenk1], "gelenk2": gelenk_indices[s.gelenk2]} for s in staebe],
+        "radius": float(radius)
+    }
+    with _lock:
+        connection = get_connection()
+        connection.execute(
+            "INSERT INTO mechanisms (name, data) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET data = excluded.data, revision = revision + 1",
+            (name, json.dumps(record))
+        )
+        invalidate_cache()
+
+def delete_mechanism_from_db(name):
+    with _lock:
+        connection = get_connection()
+        connection.execute("DELETE FROM mechanisms WHERE name = ?", (name,))
+        invalidate_cache()
+
+def mechanism_from_record(result):
+    gelenke = [
+        Gelenk(
+            g["x"],
+            g["y"],
+            g.get("is_static", g.get("static", False)),
+            g.get("is_rotating", g.get("rotating", False)),
+            g.get("is_tracked", g.get("tracked", False))
+        ) for g in result["gelenke"]
+    ]
+
+    if result["staebe"] and isinstance(result["staebe"][0], dict):
+        staebe = [Stab(gelenke[s["gelenk1"]], gelenke[s["gelenk2"]]) for s in result["staebe"]]
+    else:
+        staebe = [Stab(gelenke[s[0]], gelenke[s[1]]) for s in result["staebe"]]
+
+    radius = result["radius"]
+    return Mechanism(gelenke, staebe, radius, ergebnis_cache=standard_cache())
+
+def export_record(name, record):
+    # Reine Geometrie im Austauschformat (wie der JSON-Export), ohne einen Mechanism zu bauen
+    staebe = record["staebe"]
+    if staebe and isinstance(staebe[0], dict):
+        staebe = [[s["gelenk1"], s["gelenk2"]] for s in staebe]
+    return {
+        "mechanisms": {
+            "1": {
+                "name": name,
+                "gelenke": [
+                    {
+                        "x": g["x"],
+                        "y": g["y"],
+                        "static": g.get("is_static", g.get("static", False)),
+                        "rotating": g.get("is_rotating", g.get("rotating", False)),
+                        "tracked": g.get("is_tracked", g.get("tracked", False))
+                    } for g in record["gelenke"]
+                ],
+                "staebe": [[int(i), int(j)] for i, j in staebe],
+                "radius": record["radius"]
+            }
+        }
+    }
 
 def load_mechanism_from_db(name):
-    MechanismQuery = Query()
-    result = mechanisms_table.get(MechanismQuery.name == name)
+    result = get_mechanism_record(name)
     
     if result:
-        gelenke = [
-            Gelenk(
-                g["x"],
-                g["y"],
-                g.get("is_static", g.get("static", False)),
-                g.get("is_rotating", g.get("rotating", False)),
-                g.get("is_tracked", g.get("tracked", False))
-            ) for g in result["gelenke"]
-        ]
-
-
-        if isinstance(result["staebe"][0], dict):
-            staebe = [Stab(gelenke[s["gelenk1"]], gelenke[s["gelenk2"]]) for s in result["staebe"]]
-        else:
-            staebe = [Stab(gelenke[s[0]], gelenke[s[1]]) for s in result["staebe"]]
-
-        radius = result["radius"]
-        return Mechanism(gelenke, staebe, radius)
-
-    return None
\ No newline at end of file
+        return mechanism_from_record(result)
+
+    return None
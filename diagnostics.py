@@ -0,0 +1,104 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+
+import numpy as np
+
+from mechanism import SolverMetriken
+
+ITERATIONEN_AUFFAELLIG = 20  # wie max_iterationen im Sweep: ab hier halbiert der Sweep die Schrittweite
+
+def diagnose_solve(mechanism, aufloesung=None, profil=False, profil_zeilen=30, ohne_cache=True, abtastung=True):
+    # Trajektorientabelle frisch lösen und dabei Messwerte (optional zusätzlich cProfile) einsammeln; alles unter loese_lock,
+    # damit ein Hintergrund-Solve nicht zwischen Zurücksetzen und Auslesen in die Messwerte schreibt
+    with mechanism.loese_lock:
+        cache = mechanism.ergebnis_cache
+        if ohne_cache:
+            mechanism.ergebnis_cache = None
+        mechanism.trajectory_tables = {}
+        mechanism.abtastungen = {}
+        mechanism.metriken.clear()
+
+        profiler = cProfile.Profile() if profil else None
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            mechanism.trajectory_table(aufloesung)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            mechanism.ergebnis_cache = cache
+        gesamtzeit = time.perf_counter() - start
+
+        profil_text = None
+        if profiler is not None:
+            puffer = io.StringIO()
+            pstats.Stats(profiler, stream=puffer).sort_stats("cumulative").print_stats(profil_zeilen)
+            profil_text = puffer.getvalue()
+        bericht = diagnose_bericht(mechanism, gesamtzeit, profil_text)
+        if abtastung:
+            bericht["abtastung"] = abtastung_bericht(mechanism)
+        return bericht
+
+def abtastung_bericht(mechanism):
+    # Adaptive Abtastung getrennt messen, damit ihre Lösungen nicht in den Messwerten der Tabelle landen
+    with mechanism.loese_lock:
+        metriken = mechanism.metriken
+        mechanism.metriken = SolverMetriken(metriken.max_eintraege)
+        start = time.perf_counter()
+        try:
+            abtastung = mechanism.adaptive_abtastung()
+        finally:
+            mechanism.metriken = metriken
+        # Gezählt wird über einen Zyklus, die letzte Stützstelle (2π) ist dieselbe Stellung wie die erste
+        zyklus = slice(0, -1)
+        thetas = abtastung["theta"][zyklus]
+        return {
+            "zeit": time.perf_counter() - start,
+            "loesungen": int(abtastung["loesungen"]),
+            "stuetzstellen": len(abtastung["theta"]),
+            "totlagen_grad": np.degrees(thetas[abtastung["totpunkt"][zyklus]]).tolist(),
+            "zweigspruenge_grad": np.degrees(thetas[abtastung["zweigsprung"][zyklus]]).tolist(),
+            "nicht_montierbar": int((~abtastung["konvergiert"][zyklus]).sum()),
+        }
+
+def problemwinkel(metriken):
+    auffaellig = ~metriken["konvergiert"] | metriken["zweigwechsel"] | (metriken["iterationen"] > ITERATIONEN_AUFFAELLIG)
+    return metriken[auffaellig]
+
+def diagnose_bericht(mechanism, gesamtzeit=None, profil_text=None):
+    metriken = mechanism.metriken.as_array()
+    return {
+        "gelenke": len(mechanism.gelenke),
+        "staebe": len(mechanism.staebe),
+        "freie_koordinaten": int(mechanism.num_freie_koordinaten),
+        "geschlossen_loesbar": mechanism.dyaden is not None,
+        "gesamtzeit": gesamtzeit,
+        "zusammenfassung": mechanism.metriken.zusammenfassung(),
+        "problemwinkel": [
+            {
+                "theta_grad": float(np.degrees(m["theta"])),
+                "verfahren": str(m["verfahren"]),
+                "iterationen": int(m["iterationen"]),
+                "residuum": float(m["residuum"]),
+                "konvergiert": bool(m["konvergiert"]),
+                "zweigwechsel": bool(m["zweigwechsel"]),
+            } for m in problemwinkel(metriken)
+        ],
+        "profil": profil_text,
+    }
+
+def bericht_json(bericht):
+    return json.dumps(bericht, indent=4, ensure_ascii=False).encode("utf-8")
+
+def metriken_tabelle(metriken):
+    import pandas as pd
+    tabelle = pd.DataFrame(metriken)
+    tabelle.insert(0, "theta_grad", np.degrees(tabelle.pop("theta")))
+    return tabelle
+
+def metriken_csv(metriken):
+    return metriken_tabelle(metriken).to_csv(index=False).encode("utf-8")
@@ -0,0 +1,147 @@
+import re
+
+import numpy as np
+
+from mechanism import Mechanism, Gelenk, Stab, RESIDUUM_TOL
+
+BLOCK_GROESSE = 1024  # Varianten je gemeinsam gelöstem Block
+PARAMETER_MUSTER = re.compile(r"^(?:(radius)|G(\d+)\.([xy])|S(\d+))$")
+
+# Versuchsplanung: Varianten eines Basismechanismus (Kurbelradius, Gelenkkoordinaten, Stablängen) erzeugen und
+# alle mit der einmal analysierten Dyaden-Struktur der Basis gemeinsam lösen, ohne je Variante ein Mechanism-Objekt
+
+def parameter_ziel(mechanism, name):
+    # "radius", "G3.x" / "G3.y" für Gelenkkoordinaten, "S2" für die Länge von Stab 2 (Nummerierung wie in der Oberfläche)
+    treffer = PARAMETER_MUSTER.match(name)
+    if treffer is None:
+        raise ValueError(f"Unbekannter Parameter '{name}' (erlaubt: radius, G<i>.x, G<i>.y, S<i>)")
+    if treffer.group(1):
+        return "radius", None, None
+    if treffer.group(2) is not None:
+        index = int(treffer.group(2))
+        if index >= len(mechanism.gelenke):
+            raise ValueError(f"Gelenk G{index} existiert nicht")
+        return "gelenk", index, "xy".index(treffer.group(3))
+    index = int(treffer.group(4))
+    if index >= len(mechanism.staebe):
+        raise ValueError(f"Stab S{index} existiert nicht")
+    return "stab", index, None
+
+def gitter(bereiche, stufen):
+    # Vollfaktorieller Plan; stufen als Zahl für alle Parameter oder als {name: anzahl}
+    achsen = [np.linspace(unten, oben, stufen[name] if isinstance(stufen, dict) else stufen) for name, (unten, oben) in bereiche.items()]
+    return np.stack(np.meshgrid(*achsen, indexing="ij"), axis=-1).reshape(-1, len(achsen))
+
+def latin_hypercube(bereiche, anzahl, seed=None):
+    # Je Parameter jedes der anzahl gleich breiten Intervalle genau einmal, zufällig kombiniert
+    rng = np.random.default_rng(seed)
+    intervalle = rng.permuted(np.tile(np.arange(anzahl), (len(bereiche), 1)), axis=1).T
+    stichprobe = (intervalle + rng.random((anzahl, len(bereiche)))) / anzahl
+    grenzen = np.array(list(bereiche.values()), dtype=float).reshape(-1, 2)
+    return grenzen[:, 0] + stichprobe * (grenzen[:, 1] - grenzen[:, 0])
+
+class VariantenLoeser:
+    # Topologie und Dyaden-Reihenfolge kommen aus der einmal analysierten Basis; gelöst werden Blöcke (Varianten, Winkel) auf einmal
+    def __init__(self, basis, namen):
+        self.basis = basis
+        self.namen = list(namen)
+        self.ziele = [parameter_ziel(basis, name) for name in self.namen]
+        self.i_idx, self.j_idx = basis.i_idx, basis.j_idx
+        self.gelenk_index = basis.selected_trajectory
+
+    def geometrie(self, werte):
+        # Parameterwerte (V, P) auf Koordinaten (V, n, 2), Stablängen (V, m) und Radien (V,) abbilden
+        werte = np.asarray(werte, dtype=float).reshape(-1, len(self.namen))
+        koordinaten = np.repeat(self.basis.koordinaten[None], len(werte), axis=0)
+        radien = np.full(len(werte), float(self.basis.radius))
+        for spalte, (art, index, achse) in enumerate(self.ziele):
+            if art == "gelenk":
+                koordinaten[:, index, achse] = werte[:, spalte]
+            elif art == "radius":
+                radien = werte[:, spalte].copy()
+        laengen = np.linalg.norm(koordinaten[:, self.i_idx] - koordinaten[:, self.j_idx], axis=-1)
+        for spalte, (art, index, _) in enumerate(self.ziele):
+            if art == "stab":
+                laengen[:, index] = werte[:, spalte]
+        return koordinaten, laengen, radien
+
+    def loese(self, koordinaten, laengen, radien, thetas):
+        # Mechanism.loese_dyaden(fortlaufend=True) der Basis, mit der Variantenachse vorn
+        drehpunkte = koordinaten[:, self.basis.rotating_gelenk_index, None]
+        rotationspunkte = drehpunkte + radien[:, None, None] * np.stack([np.cos(thetas), np.sin(thetas)], axis=-1)
+        # Unter dem Lock der Basis, damit letzte_zweigwechsel nicht von einem parallelen Lösen überschrieben wird
+        with self.basis.loese_lock:
+            positionen, gueltig = self.basis.loese_dyaden(rotationspunkte, fortlaufend=True, koordinaten=koordinaten, laengen=laengen)
+            return positionen, gueltig, self.basis.letzte_zweigwechsel
+
+    def loese_einzeln(self, koordinaten, laengen, radien, thetas):
+        # Ohne Dyaden-Zerlegung bleibt nur der iterative Sweep je Variante (mit eigenem Mechanism-Objekt)
+        positionen = np.empty((len(koordinaten), len(thetas), len(self.basis.gelenke), 2))
+        zweigwechsel = np.zeros((len(koordinaten), len(thetas)), dtype=bool)
+        for v in range(len(koordinaten)):
+            gelenke = [Gelenk(x, y, g.is_static, g.is_rotating, g.is_tracked) for (x, y), g in zip(koordinaten[v], self.basis.gelenke)]
+            mechanism = Mechanism(gelenke, [Stab(gelenke[i], gelenke[j]) for i, j in zip(self.i_idx, self.j_idx)], radien[v])
+            mechanism.start_laengen = laengen[v]
+            positionen[v] = mechanism.sweep(thetas)
+            zweigwechsel[v] = mechanism.letzte_zweigwechsel
+        return positionen, np.ones(zweigwechsel.shape, dtype=bool), zweigwechsel
+
+    def kennzahlen(self, werte, num_winkel=72):
+        koordinaten, laengen, radien = self.geometrie(werte)
+        thetas = np.linspace(0, 2 * np.pi, num_winkel)
+        loeser = self.loese if self.basis.dyaden is not None else self.loese_einzeln
+        positionen, gueltig, zweigwechsel = loeser(koordinaten, laengen, radien, thetas)
+
+        # Montierbar heißt: geschlossen lösbar und alle Stablängen innerhalb der Toleranz des Solvers
+        residuum = np.abs(np.linalg.norm(positionen[:, :, self.i_idx] - positionen[:, :, self.j_idx], axis=-1) - laengen[:, None]).max(axis=-1, initial=0.0)
+        gueltig &= residuum <= RESIDUUM_TOL * np.maximum(laengen.max(axis=-1, initial=0.0), 1.0)[:, None]
+        bahn = positionen[:, :-1, self.gelenk_index]
+        schritte = np.linalg.norm(np.roll(bahn, -1, axis=1) - bahn, axis=-1)
+        x, y = bahn[..., 0], bahn[..., 1]
+        spalten = {name: werte[:, p] for p, name in enumerate(self.namen)}
+        spalten.update({
+            "montierbar": gueltig.all(axis=1),
+            "anteil_montierbar": gueltig.mean(axis=1),
+            "residuum_max": residuum.max(axis=1),
+            "zweigwechsel": zweigwechsel.sum(axis=1),
+            "x_min": x.min(axis=1),
+            "x_max": x.max(axis=1),
+            "y_min": y.min(axis=1),
+            "y_max": y.max(axis=1),
+            "bahn_laenge": schritte.sum(axis=1),
+            "schritt_max": schritte.max(axis=1),
+            "flaeche": 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1)),
+        })
+        return spalten
+
+def studie(basis, bereiche, stufen=None, anzahl=None, seed=None, num_winkel=72, block_groesse=BLOCK_GROESSE):
+    # Gitter (stufen) oder Latin Hypercube (anzahl) erzeugen, blockweise lösen; Ergebnis ist eine Spaltentabelle {name: array}
+    if (stufen is None) == (anzahl is None):
+        raise ValueError("Entweder stufen (Gitter) oder anzahl (Latin Hypercube) angeben")
+    werte = gitter(bereiche, stufen) if stufen is not None else latin_hypercube(bereiche, anzahl, seed)
+    loeser = VariantenLoeser(basis, bereiche)
+    bloecke = [loeser.kennzahlen(werte[start:start + block_groesse], num_winkel) for start in range(0, len(werte), block_groesse)]
+    return {name: np.concatenate([block[name] for block in bloecke]) for name in bloecke[0]} if bloecke else {}
+
+def als_tabelle(ergebnisse):
+    import pandas as pd
+    return pd.DataFrame(ergebnisse)
+
+def schreibe_ergebnisse(datei, ergebnisse, format="csv"):
+    namen = list(ergebnisse)
+    if format == "csv":
+        datei.write((",".join(namen) + "\n").encode("utf-8"))
+        np.savetxt(datei, np.column_stack([ergebnisse[name].astype(float) for name in namen]), fmt="%.10g", delimiter=",")
+    elif format == "npy":
+        np.save(datei, np.rec.fromarrays([ergebnisse[name] for name in namen], names=namen))
+    elif format in ("parquet", "feather"):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        tabelle = pa.table({name: ergebnisse[name] for name in namen})
+        if format == "parquet":
+            pq.write_table(tabelle, datei)
+        else:
+            feather.write_feather(tabelle, datei)
+    else:
+        raise ValueError(f"Unbekanntes Exportformat: {format}")
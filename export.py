@@ -0,0 +1,124 @@
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+from animation import create_animation_scene, frame_positionen
+
+def render_frames(fig, update, frames, dpi=None):
+    # Frames direkt aus dem Agg-Puffer lesen, ohne Umweg über eine Animationsdatei.
+    # Achsen, Gitter und Kurbelkreis werden einmal als Hintergrund gerendert, pro Frame nur die bewegten Artists.
+    canvas = FigureCanvasAgg(fig)
+    if dpi is not None:
+        fig.set_dpi(dpi)
+    artists = update(frames[0])
+    for artist in artists:
+        artist.set_animated(True)
+    canvas.draw()
+    hintergrund = canvas.copy_from_bbox(fig.bbox)
+    for frame in frames:
+        artists = update(frame)
+        canvas.restore_region(hintergrund)
+        for artist in artists:
+            fig.draw_artist(artist)
+        yield np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+def _render_mechanism_chunk(mechanism, positions_over_time, options, frames, dpi):
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, update = create_animation_scene(mechanism, positions_over_time, *options)
+    bilder = list(render_frames(fig, update, frames, dpi))
+    plt.close(fig)
+    return bilder
+
+def render_mechanism_frames(mechanism, num_frames=50, show_length_error=False, show_stab_lengths=False, show_stab_angles=False, dpi=None, max_workers=1):
+    # Positionen kommen aus der gecachten Trajektorientabelle (mit Längenfehler gelöst); bei max_workers > 1 rastern mehrere
+    # Prozesse je einen Frame-Block
+    import matplotlib.pyplot as plt
+    positions_over_time = frame_positionen(mechanism, num_frames, show_length_error)
+    options = (show_length_error, show_stab_lengths, show_stab_angles)
+    frames = list(range(num_frames))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1:
+        fig, update = create_animation_scene(mechanism, positions_over_time, *options)
+        try:
+            yield from render_frames(fig, update, frames, dpi)
+        finally:
+            # Auch schließen, wenn der Aufrufer den Generator vorzeitig verlässt
+            plt.close(fig)
+        return
+
+    bloecke = [list(b) for b in np.array_split(frames, min(max_workers, num_frames))]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        ergebnisse = [executor.submit(_render_mechanism_chunk, mechanism, positions_over_time, options, b, dpi) for b in bloecke]
+        for ergebnis in ergebnisse:
+            yield from ergebnis.result()
+
+def encode_gif(frames, fps=10, paletten_frames=8):
+    # Eine gemeinsame Palette aus mehreren über die Animation verteilten Frames (inkl. erstem und letztem), damit
+    # erst später gezeichnete Farben (Trajektorie, Geschwindigkeitspfeile) nicht auf Grau fallen
+    frames = list(frames)
+    auswahl = np.unique(np.linspace(0, len(frames) - 1, min(paletten_frames, len(frames))).astype(int))
+    palette = Image.fromarray(np.concatenate([frames[i] for i in auswahl])).quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+    bilder = [Image.fromarray(f).quantize(palette=palette, dither=Image.Dither.NONE) for f in frames]
+
+    buffer = BytesIO()
+    bilder[0].save(buffer, format="GIF", save_all=True, append_images=bilder[1:], duration=int(1000 / fps), loop=0)
+    return buffer.getvalue()
+
+def ffmpeg_available():
+    return shutil.which(matplotlib.rcParams["animation.ffmpeg_path"]) is not None
+
+def encode_video(frames, fps=10, format="mp4"):
+    # Frames werden beim Rendern direkt in ffmpeg gestreamt; das Ergebnis landet ohne Temporärdatei im Speicher
+    if not ffmpeg_available():
+        raise RuntimeError("ffmpeg wurde nicht gefunden, Video-Export ist nicht verfügbar.")
+    frames = iter(frames)
+    erstes = next(frames)
+    hoehe, breite = erstes.shape[:2]
+    # yuv420p braucht gerade Abmessungen
+    hoehe, breite = hoehe - hoehe % 2, breite - breite % 2
+
+    if format == "webm":
+        codec = ["-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "35", "-f", "webm"]
+    else:
+        codec = ["-c:v", "libx264", "-preset", "veryfast", "-movflags", "frag_keyframe+empty_moov", "-f", "mp4"]
+    befehl = [matplotlib.rcParams["animation.ffmpeg_path"], "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+              "-s", f"{breite}x{hoehe}", "-r", str(fps), "-i", "pipe:0", "-pix_fmt", "yuv420p", *codec, "pipe:1"]
+
+    prozess = subprocess.Popen(befehl, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # stdout und stderr parallel leeren, sonst blockiert ffmpeg, sobald eine der beiden Pipes voll ist
+    ausgabe, fehler = BytesIO(), BytesIO()
+    leser = [threading.Thread(target=shutil.copyfileobj, args=(quelle, ziel)) for quelle, ziel in ((prozess.stdout, ausgabe), (prozess.stderr, fehler))]
+    for thread in leser:
+        thread.start()
+    try:
+        for frame in _prepend(erstes, frames):
+            prozess.stdin.write(np.ascontiguousarray(frame[:hoehe, :breite]).tobytes())
+    finally:
+        prozess.stdin.close()
+        for thread in leser:
+            thread.join()
+        prozess.wait()
+    if prozess.returncode != 0:
+        raise RuntimeError(f"ffmpeg ist fehlgeschlagen: {fehler.getvalue().decode(errors='replace')}")
+    return ausgabe.getvalue()
+
+def _prepend(erstes, frames):
+    yield erstes
+    yield from frames
+
+def mechanism_animation_bytes(mechanism, format="gif", fps=10, num_frames=50, show_length_error=False, show_stab_lengths=False, show_stab_angles=False, max_workers=1):
+    frames = render_mechanism_frames(mechanism, num_frames, show_length_error, show_stab_lengths, show_stab_angles, max_workers=max_workers)
+    if format == "gif":
+        return encode_gif(frames, fps)
+    return encode_video(frames, fps, format)
@@ -1,27 +1,139 @@
+import threading
+import time
 import numpy as np
-from scipy.optimize import minimize
+from scipy import sparse
+from scipy.sparse.linalg import spsolve, splu
+
+DUENN_AB = 64  # ab so vielen freien Koordinaten wird dünnbesetzt gerechnet
+RESIDUUM_TOL = 1e-6  # relativer Stablängenfehler, ab dem eine Stellung als nicht montierbar gilt
+ABTAST_TOL = 1e-5  # zulässige Abweichung der Gelenkbahnen von der Sehne zwischen zwei Stützstellen, relativ zum längsten Stab
+KINEMATIK_REGULARISIERUNG = 1e-12  # relativ zur größten Diagonale von JᵀJ im dünnbesetzten Kinematik-Löser
+LOESER_MAX_ITER = 100  # Iterationsgrenze des Levenberg-Marquardt-Lösers
+LOESER_TOL = 1e-10  # Abbruch über Gradient, Kostenabnahme und Schrittweite
+SWEEP_MAX_ITERATIONEN = 20  # braucht ein Winkel im Sweep mehr Iterationen, wird der Schritt halbiert
+SWEEP_MAX_HALBIERUNGEN = 4
+TOTPUNKT_TOL = 1e-2  # Totpunktmaß relativ zu seinem Median über den Zyklus, unterhalb dessen ein lokales Minimum als Totlage gilt
+TOTPUNKT_VERDACHT = 1e-1  # ab hier wird ein lokales Minimum des relativen Totpunktmaßes weiter eingegrenzt
+TOTPUNKT_WINKEL = 1024  # feinstes Raster dieser Eingrenzung, unabhängig von max_winkel der Genauigkeitsverfeinerung
+
+METRIK_DTYPE = np.dtype([
+    ("theta", np.float64),
+    ("verfahren", "U6"),
+    ("zeit", np.float64),
+    ("iterationen", np.int32),
+    ("auswertungen", np.int32),
+    ("residuum", np.float64),
+    ("konvergiert", np.bool_),
+    ("zweigwechsel", np.bool_),
+])
 
 class Gelenk:
+    __slots__ = ("koordinaten", "is_static", "is_rotating", "is_tracked")
+
     def __init__(self, x, y, is_static=False, is_rotating=False, is_tracked=False):
-        self.x = x
-        self.y = y
+        self.koordinaten = np.array([x, y], dtype=float)
         self.is_static = is_static
         self.is_rotating = is_rotating
         self.is_tracked = is_tracked
 
+    @property
+    def x(self):
+        return float(self.koordinaten[0])
+
+    @x.setter
+    def x(self, wert):
+        self.koordinaten[0] = wert
+
+    @property
+    def y(self):
+        return float(self.koordinaten[1])
+
+    @y.setter
+    def y(self, wert):
+        self.koordinaten[1] = wert
+
     def position(self):
-        return np.array([self.x, self.y])
+        return self.koordinaten
 
 class Stab:
+    __slots__ = ("gelenk1", "gelenk2")
+
     def __init__(self, gelenk1, gelenk2):
         self.gelenk1 = gelenk1
         self.gelenk2 = gelenk2
 
+class SolverMetriken:
+    # Messwerte je gelöstem Winkel (Zeit, Iterationen, Residuum, Zweigwechsel) als strukturiertes Array.
+    # Gesammelt wird blockweise, hooks werden mit jedem neuen Block aufgerufen (z. B. für Logging oder externe Profiler).
+    def __init__(self, max_eintraege=100000):
+        self.max_eintraege = max_eintraege
+        self.bloecke = []
+        self.anzahl = 0
+        self.hooks = []
+
+    def add(self, thetas, verfahren, zeit, iterationen, auswertungen, residuum, konvergiert, zweigwechsel=False):
+        thetas = np.atleast_1d(np.asarray(thetas, dtype=float))
+        block = np.zeros(len(thetas), dtype=METRIK_DTYPE)
+        block["theta"] = np.mod(thetas, 2 * np.pi)
+        block["verfahren"] = verfahren
+        block["zeit"] = zeit
+        block["iterationen"] = iterationen
+        block["auswertungen"] = auswertungen
+        block["residuum"] = residuum
+        block["konvergiert"] = konvergiert
+        block["zweigwechsel"] = zweigwechsel
+        self.bloecke.append(block)
+        self.anzahl += len(block)
+        while self.anzahl > self.max_eintraege and len(self.bloecke) > 1:
+            self.anzahl -= len(self.bloecke.pop(0))
+        for hook in self.hooks:
+            hook(block)
+
+    def as_array(self):
+        # Lesen über eine Kopie der Blockliste, damit ein gleichzeitiges add (unter loese_lock) nicht dazwischenfunkt
+        bloecke = list(self.bloecke)
+        if not bloecke:
+            return np.zeros(0, dtype=METRIK_DTYPE)
+        return np.concatenate(bloecke)
+
+    def clear(self):
+        self.bloecke = []
+        self.anzahl = 0
+
+    def __len__(self):
+        return self.anzahl
+
+    def zusammenfassung(self):
+        werte = self.as_array()
+        verfahren = {}
+        for name in np.unique(werte["verfahren"]):
+            teil = werte[werte["verfahren"] == name]
+            verfahren[str(name)] = {
+                "winkel": int(len(teil)),
+                "zeit": float(teil["zeit"].sum()),
+                "iterationen_mittel": float(teil["iterationen"].mean()),
+                "iterationen_max": int(teil["iterationen"].max()),
+                "auswertungen": int(teil["auswertungen"].sum()),
+            }
+        return {
+            "winkel": int(len(werte)),
+            "zeit": float(werte["zeit"].sum()),
+            "residuum_max": float(werte["residuum"].max(initial=0.0)),
+            "nicht_konvergiert": int((~werte["konvergiert"]).sum()),
+            "zweigwechsel": int(werte["zweigwechsel"].sum()),
+            "verfahren": verfahren,
+        }
+
 class Mechanism:
-    def __init__(self, gelenke, staebe, radius):
+    def __init__(self, gelenke, staebe, radius, ergebnis_cache=None):
         self.gelenke = gelenke
         self.staebe = staebe
         self.radius = radius
+
+        # Alle Gelenkkoordinaten liegen zusammenhängend in einem (n, 2)-Array, die Gelenke halten nur Sichten darauf
+        self.koordinaten = np.array([g.position() for g in gelenke], dtype=float).reshape(-1, 2)
+        for i, g in enumerate(gelenke):
+            g.koordinaten = self.koordinaten[i]
         
         self.fixed_gelenk_index = next((i for i, g in enumerate(gelenke) if g.is_static), None)
         self.rotating_gelenk_index = next((i for i, g in enumerate(gelenke) if g.is_rotating), None)
@@ -30,71 +142,768 @@ class Mechanism:
             raise ValueError("Fehler: Es muss genau ein fixiertes und ein rotierendes Gelenk geben!")
         
         self.theta_values = np.linspace(0, 2 * np.pi, 72)
-        self.verbindungs_matrix = self.create_verbindungs_matrix()
+        self.freie_indices = [i for i in range(len(gelenke)) if i not in [self.fixed_gelenk_index, self.rotating_gelenk_index]]
+        self.create_topologie()
         self.start_laengen = self.berechnet_laengen()
-        self.trajectories = {i: [] for i in range(len(self.gelenke))}
+        self.dyaden = self.analysiere_dyaden()
+        self.metriken = SolverMetriken()
         self.selected_trajectory = next((i for i, g in enumerate(gelenke) if g.is_tracked), self.rotating_gelenk_index)
         
-        for theta in self.theta_values:
-            positions = self.update_positions(theta)
-            for i, pos in enumerate(positions):
-                self.trajectories[i].append(tuple(pos))
-
-    def create_verbindungs_matrix(self):
-        num_staebe = len(self.staebe)
-        num_gelenke = len(self.gelenke)
-        verbindungs_matrix = np.zeros((2 * num_staebe, 2 * num_gelenke))
-
-        for i, stab in enumerate(self.staebe):
-            p1_idx = self.gelenke.index(stab.gelenk1) * 2
-            p2_idx = self.gelenke.index(stab.gelenk2) * 2
-
-            verbindungs_matrix[2 * i, p1_idx] = 1
-            verbindungs_matrix[2 * i, p2_idx] = -1
-            verbindungs_matrix[2 * i + 1, p1_idx + 1] = 1
-            verbindungs_matrix[2 * i + 1, p2_idx + 1] = -1
-        
-        return verbindungs_matrix
+        # Gelöst wird erst beim ersten Zugriff auf Trajektorien (oder explizit über solve), nicht beim Erzeugen
+        self.ergebnis_cache = ergebnis_cache
+        self.trajectory_tables = {}
+        self.abtastungen = {}
+        self.loese_lock = threading.RLock()
+        self.hintergrund = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["loese_lock"] = None
+        state["hintergrund"] = None
+        state["metriken"] = SolverMetriken(self.metriken.max_eintraege)
+        return state
+
+    def __setstate__(self, state):
+        # Nach dem Entpickeln zeigen die Gelenke auf Kopien, die Sichten werden neu gebunden
+        self.__dict__.update(state)
+        self.loese_lock = threading.RLock()
+        for i, g in enumerate(self.gelenke):
+            g.koordinaten = self.koordinaten[i]
+
+    def solve(self, aufloesung=None, im_hintergrund=False):
+        # Tabelle vorab berechnen; im Hintergrund läuft sie in einem Thread, spätere Zugriffe warten auf das Ergebnis
+        if not im_hintergrund:
+            return self.trajectory_table(aufloesung)
+        self.hintergrund = threading.Thread(target=self.trajectory_table, args=(aufloesung,), daemon=True)
+        self.hintergrund.start()
+        return self.hintergrund
+
+    def is_solved(self, aufloesung=None):
+        return (len(self.theta_values) if aufloesung is None else aufloesung) in self.trajectory_tables
+
+    def create_topologie(self):
+        # Kantenlisten (i_idx -> j_idx) einmalig aufbauen; alle Längen, Fehler und Winkel laufen darüber
+        self.gelenk_indices = {g: i for i, g in enumerate(self.gelenke)}
+        self.i_idx = np.array([self.gelenk_indices[s.gelenk1] for s in self.staebe], dtype=int)
+        self.j_idx = np.array([self.gelenk_indices[s.gelenk2] for s in self.staebe], dtype=int)
+
+        # Struktur der Jacobi-Matrix bezüglich der freien Koordinaten (Zeile = Stab, Spalte = 2 * freies Gelenk + Achse)
+        freie_position = np.full(len(self.gelenke), -1)
+        freie_position[self.freie_indices] = np.arange(len(self.freie_indices))
+        stab_nummern = np.arange(len(self.staebe))
+        zeilen, spalten, achsen, vorzeichen = [], [], [], []
+        for idx, richtung in ((self.i_idx, 1.0), (self.j_idx, -1.0)):
+            maske = freie_position[idx] >= 0
+            for achse in (0, 1):
+                zeilen.append(stab_nummern[maske])
+                spalten.append(2 * freie_position[idx[maske]] + achse)
+                achsen.append(np.full(maske.sum(), achse))
+                vorzeichen.append(np.full(maske.sum(), richtung))
+        self.jacobi_zeilen = np.concatenate(zeilen)
+        self.jacobi_spalten = np.concatenate(spalten)
+        self.jacobi_achsen = np.concatenate(achsen)
+        self.jacobi_vorzeichen = np.concatenate(vorzeichen)
+        self.num_freie_koordinaten = 2 * len(self.freie_indices)
+
+    def analysiere_dyaden(self):
+        # Zerlegung in Zweischläge (RRR-Dyaden): ein freies Gelenk hängt über genau zwei Stäbe an bereits bekannten Gelenken.
+        # Gelingt das für alle freien Gelenke und wird dabei jeder Stab an einem freien Gelenk genau einmal verwendet,
+        # lässt sich jede Stellung geschlossen über Kreisschnitte berechnen.
+        bekannt = {self.fixed_gelenk_index, self.rotating_gelenk_index}
+        offen = set(self.freie_indices)
+        staebe_an = {k: [] for k in offen}
+        for s, (i, j) in enumerate(zip(self.i_idx, self.j_idx)):
+            if i in offen:
+                staebe_an[i].append((s, j))
+            if j in offen:
+                staebe_an[j].append((s, i))
+
+        dyaden = []
+        verwendet = set()
+        while offen:
+            schritt = None
+            for k in sorted(offen):
+                anschluesse = [(s, n) for s, n in staebe_an[k] if n in bekannt]
+                if len(anschluesse) >= 2:
+                    schritt = (k, anschluesse[0], anschluesse[1])
+                    break
+            if schritt is None:
+                return None
+
+            k, (stab_a, a), (stab_b, b) = schritt
+            verbindung = self.koordinaten[b] - self.koordinaten[a]
+            lage = self.koordinaten[k] - self.koordinaten[a]
+            vorzeichen = 1.0 if verbindung[0] * lage[1] - verbindung[1] * lage[0] >= 0 else -1.0
+            dyaden.append((k, a, b, stab_a, stab_b, vorzeichen))
+            verwendet.update((stab_a, stab_b))
+            bekannt.add(k)
+            offen.remove(k)
+
+        an_freien_gelenken = {s for k in staebe_an for s, _ in staebe_an[k]}
+        if verwendet != an_freien_gelenken:
+            return None
+        return dyaden
+
+    def loese_dyaden(self, rotationspunkte, referenz=None, fortlaufend=False, koordinaten=None, laengen=None):
+        # Geschlossene Lösung für N Stellungen gleichzeitig; der Zweig folgt der Referenz (z. B. vorheriger Winkel)
+        # bzw. ohne Referenz der Einbaulage der Ausgangsgeometrie. Bei fortlaufend=True sind die Stellungen eine
+        # Winkelfolge und jeder Winkel übernimmt den Zweig, der dem vorherigen Winkel am nächsten liegt.
+        # Mit koordinaten (V, n, 2) und optional laengen (V, m) werden V Varianten derselben Topologie gemeinsam gelöst,
+        # rotationspunkte sind dann (V, N, 2) und alle Ergebnisse tragen vorn die Variantenachse.
+        with self.loese_lock:
+            varianten = koordinaten is not None
+            if varianten:
+                koordinaten = np.asarray(koordinaten, dtype=float).reshape(-1, len(self.gelenke), 2)
+                if laengen is None:
+                    laengen = np.linalg.norm(koordinaten[:, self.i_idx] - koordinaten[:, self.j_idx], axis=-1)
+            else:
+                koordinaten = self.koordinaten[None]
+                laengen = self.start_laengen
+            laengen = np.asarray(laengen, dtype=float).reshape(len(koordinaten), -1)
+            rotationspunkte = np.asarray(rotationspunkte, dtype=float).reshape(len(koordinaten), -1, 2)
+            num_varianten, num_stellungen = rotationspunkte.shape[:2]
+
+            positionen = np.repeat(koordinaten[:, None], num_stellungen, axis=1)
+            positionen[:, :, self.rotating_gelenk_index] = rotationspunkte
+            gueltig = np.ones((num_varianten, num_stellungen), dtype=bool)
+            zweigwechsel = np.zeros((num_varianten, num_stellungen), dtype=bool)
+
+            for k, a, b, stab_a, stab_b, vorzeichen in self.dyaden:
+                laenge_a, laenge_b = laengen[:, stab_a, None], laengen[:, stab_b, None]
+                verbindung = positionen[:, :, b] - positionen[:, :, a]
+                abstand = np.linalg.norm(verbindung, axis=-1)
+                sicher = np.where(abstand > 0, abstand, 1.0)
+                richtung = verbindung / sicher[..., None]
+                normale = np.stack([-richtung[..., 1], richtung[..., 0]], axis=-1)
+                entlang = (laenge_a ** 2 - laenge_b ** 2 + abstand ** 2) / (2 * sicher)
+                hoehe_quadrat = laenge_a ** 2 - entlang ** 2
+                gueltig &= (abstand > 0) & (hoehe_quadrat >= 0)
+                hoehe = np.sqrt(np.maximum(hoehe_quadrat, 0.0))
+                fusspunkt = positionen[:, :, a] + entlang[..., None] * richtung
 
-    def berechnet_laengen(self):
-        gelenk_vektor = np.array([g.position() for g in self.gelenke]).flatten()
-        stab_laenge = self.verbindungs_matrix @ gelenk_vektor
-        laengen = np.linalg.norm(stab_laenge.reshape(-1, 2), axis=1)
-        return laengen
+                if referenz is not None:
+                    ziel = np.asarray(referenz, dtype=float).reshape(num_varianten, -1, len(self.gelenke), 2)[:, :, k]
+                    zweig = np.where(np.einsum('vij,vij->vi', ziel - fusspunkt, normale) >= 0, 1.0, -1.0)
+                    zweig = np.broadcast_to(zweig, (num_varianten, num_stellungen))
+                elif varianten:
+                    # Einbaulage je Variante aus ihrer eigenen Ausgangsgeometrie
+                    basis_verbindung = koordinaten[:, b] - koordinaten[:, a]
+                    basis_lage = koordinaten[:, k] - koordinaten[:, a]
+                    kreuz = basis_verbindung[:, 0] * basis_lage[:, 1] - basis_verbindung[:, 1] * basis_lage[:, 0]
+                    zweig = np.broadcast_to(np.where(kreuz >= 0, 1.0, -1.0)[:, None], (num_varianten, num_stellungen))
+                else:
+                    zweig = np.full((num_varianten, num_stellungen), vorzeichen)
+
+                if fortlaufend and num_stellungen > 1:
+                    plus = fusspunkt + hoehe[..., None] * normale
+                    minus = fusspunkt - hoehe[..., None] * normale
+                    bleiben = (np.linalg.norm(plus[:, 1:] - plus[:, :-1], axis=-1) + np.linalg.norm(minus[:, 1:] - minus[:, :-1], axis=-1)
+                               <= np.linalg.norm(plus[:, 1:] - minus[:, :-1], axis=-1) + np.linalg.norm(minus[:, 1:] - plus[:, :-1], axis=-1))
+                    zweig = zweig[:, :1] * np.cumprod(np.concatenate([np.ones((num_varianten, 1)), np.where(bleiben, 1.0, -1.0)], axis=1), axis=1)
+                    zweigwechsel[:, 1:] |= ~bleiben
+
+                positionen[:, :, k] = fusspunkt + (zweig * hoehe)[..., None] * normale
+
+            if not varianten:
+                positionen, gueltig, zweigwechsel = positionen[0], gueltig[0], zweigwechsel[0]
+            self.letzte_zweigwechsel = zweigwechsel
+            return positionen, gueltig
+
+    def stab_vektoren(self, positionen):
+        return positionen[..., self.i_idx, :] - positionen[..., self.j_idx, :]
+
+    def berechnet_laengen(self, positionen=None):
+        if positionen is None:
+            positionen = self.koordinaten
+        return np.linalg.norm(self.stab_vektoren(positionen), axis=-1)
     
-    def fehlerfunktion(self, positions, rotationspunkt_neu):
-        gelenk_vektor = np.vstack((
-            self.gelenke[self.fixed_gelenk_index].position().reshape(1, -1),
-            rotationspunkt_neu.reshape(1, -1),
-            np.array(positions).reshape(-1, 2)
-        )).flatten()
-
-        current_laengen = self.verbindungs_matrix @ gelenk_vektor
-        laengen = np.linalg.norm(current_laengen.reshape(-1, 2), axis=1)
-        return np.sum((laengen - self.start_laengen) ** 2)
-
-    def update_positions(self, theta):
-        rotating_gelenk = self.gelenke[self.rotating_gelenk_index]
-        rotationspunkt_neu = np.array([
-            rotating_gelenk.x + self.radius * np.cos(theta),
-            rotating_gelenk.y + self.radius * np.sin(theta)
-        ])
-        
-        initial_guess = np.hstack([
-            p.position()
-            for i, p in enumerate(self.gelenke)
-            if i not in [self.fixed_gelenk_index, self.rotating_gelenk_index]
-        ]).flatten()
+    def residuen(self, positionen):
+        stab_vektoren = self.stab_vektoren(positionen)
+        laengen = np.linalg.norm(stab_vektoren, axis=-1)
+        return laengen - self.start_laengen, stab_vektoren, laengen
 
-        result = minimize(self.fehlerfunktion, initial_guess, args=(rotationspunkt_neu,), method='SLSQP')
-        
-        optimized_positions = np.zeros((len(self.gelenke), 2))
-        optimized_positions[self.fixed_gelenk_index] = self.gelenke[self.fixed_gelenk_index].position()
-        optimized_positions[self.rotating_gelenk_index] = rotationspunkt_neu
-        remaining_indices = [i for i in range(len(self.gelenke)) if i not in [self.fixed_gelenk_index, self.rotating_gelenk_index]]
-        optimized_positions[remaining_indices] = result.x.reshape(-1, 2)
-        
-        for i, pos in enumerate(optimized_positions):
-            self.trajectories[i].append(tuple(pos))
+    def stellungs_residuum(self, positionen):
+        return np.abs(self.residuen(positionen)[0]).max(axis=-1, initial=0.0)
+
+    def ist_konvergiert(self, residuum):
+        return residuum <= RESIDUUM_TOL * max(self.start_laengen.max(initial=0.0), 1.0)
+
+    def jacobi_werte(self, stab_vektoren, laengen):
+        # d|p1 - p2| / dp = ± Einheitsvektor des Stabes
+        richtungen = stab_vektoren / np.where(laengen > 0, laengen, 1.0)[..., None]
+        return self.jacobi_vorzeichen * richtungen[..., self.jacobi_zeilen, self.jacobi_achsen]
+
+    def jacobi_matrix(self, stab_vektoren, laengen):
+        werte = self.jacobi_werte(stab_vektoren, laengen)
+        form = (len(self.staebe), self.num_freie_koordinaten)
+        if self.num_freie_koordinaten >= DUENN_AB:
+            return sparse.csr_matrix((werte, (self.jacobi_zeilen, self.jacobi_spalten)), shape=form)
+        jacobi = np.zeros(form)
+        jacobi[self.jacobi_zeilen, self.jacobi_spalten] = werte
+        return jacobi
+
+    @staticmethod
+    def loese_normalgleichung(normal_matrix, gradient, daempfung):
+        if sparse.issparse(normal_matrix):
+            gedaempft = normal_matrix + daempfung * sparse.identity(normal_matrix.shape[0], format="csr")
+            return spsolve(gedaempft.tocsc(), -gradient)
+        return np.linalg.solve(normal_matrix + daempfung * np.eye(len(gradient)), -gradient)
+
+    def loese_positionen(self, rotationspunkt_neu, initial_guess, max_iter=LOESER_MAX_ITER, tol=LOESER_TOL):
+        # Levenberg-Marquardt auf den Stablängen-Residuen mit analytischer Jacobi-Matrix
+        positionen = np.zeros((len(self.gelenke), 2))
+        positionen[self.fixed_gelenk_index] = self.koordinaten[self.fixed_gelenk_index]
+        positionen[self.rotating_gelenk_index] = rotationspunkt_neu
+        positionen[self.freie_indices] = np.asarray(initial_guess, dtype=float).reshape(-1, 2)
+
+        residuen, stab_vektoren, laengen = self.residuen(positionen)
+        kosten = residuen @ residuen
+        daempfung = None
+        self.letzte_auswertungen = 1
+
+        for iteration in range(1, max_iter + 1):
+            jacobi = self.jacobi_matrix(stab_vektoren, laengen)
+            gradient = jacobi.T @ residuen
+            if np.max(np.abs(gradient), initial=0.0) < tol:
+                break
+
+            normal_matrix = jacobi.T @ jacobi
+            if daempfung is None:
+                daempfung = 1e-3 * max(normal_matrix.diagonal().max(initial=0.0), 1.0)
+
+            while True:
+                schritt = self.loese_normalgleichung(normal_matrix, gradient, daempfung)
+                neue_positionen = positionen.copy()
+                neue_positionen[self.freie_indices] += schritt.reshape(-1, 2)
+                neue_residuen, neue_stab_vektoren, neue_laengen = self.residuen(neue_positionen)
+                neue_kosten = neue_residuen @ neue_residuen
+                self.letzte_auswertungen += 1
+                if neue_kosten <= kosten:
+                    break
+                daempfung *= 10
+                if daempfung > 1e12:
+                    schritt = None
+                    break
+
+            if schritt is None:
+                break
+
+            positionen = neue_positionen
+            residuen, stab_vektoren, laengen = neue_residuen, neue_stab_vektoren, neue_laengen
+            konvergiert = kosten - neue_kosten <= tol * kosten or np.linalg.norm(schritt) <= tol * (1 + np.linalg.norm(positionen))
+            kosten = neue_kosten
+            daempfung = max(daempfung / 10, 1e-15)
+            if konvergiert:
+                break
+
+        return positionen, iteration
+
+    def rotationspunkte(self, thetas):
+        mittelpunkt = self.koordinaten[self.rotating_gelenk_index]
+        thetas = np.asarray(thetas, dtype=float)
+        return np.stack([
+            mittelpunkt[0] + self.radius * np.cos(thetas),
+            mittelpunkt[1] + self.radius * np.sin(thetas)
+        ], axis=-1)
+
+    def solve_angles(self, thetas, startwerte=None, max_iter=LOESER_MAX_ITER, tol=LOESER_TOL, block_groesse=None):
+        # Alle Winkel gemeinsam lösen: gestapelte Residuen, blockdiagonale Jacobi-Matrix
+        with self.loese_lock:
+            thetas = np.atleast_1d(np.asarray(thetas, dtype=float))
+            if startwerte is None:
+                startwerte = self.positions_at(thetas)
+            positionen = np.array(startwerte, dtype=float).reshape(len(thetas), len(self.gelenke), 2)
+            positionen[:, self.fixed_gelenk_index] = self.koordinaten[self.fixed_gelenk_index]
+            positionen[:, self.rotating_gelenk_index] = self.rotationspunkte(thetas)
+
+            iterativ = np.ones(len(thetas), dtype=bool)
+            if self.dyaden is not None:
+                start = time.perf_counter()
+                geschlossen, gueltig = self.loese_dyaden(positionen[:, self.rotating_gelenk_index], positionen)
+                positionen[gueltig] = geschlossen[gueltig]
+                residuum = self.stellungs_residuum(positionen[gueltig])
+                self.metriken.add(thetas[gueltig], "dyade", (time.perf_counter() - start) / max(len(thetas), 1), 0, 1,
+                                  residuum, self.ist_konvergiert(residuum))
+                iterativ = ~gueltig
+
+            if iterativ.any():
+                # Nicht geschlossen lösbare bzw. nicht montierbare Stellungen iterativ (kleinste Fehlerquadrate) lösen
+                start = time.perf_counter()
+                positionen[iterativ] = self.solve_iterativ(positionen[iterativ], max_iter, tol, block_groesse)
+                residuum = self.stellungs_residuum(positionen[iterativ])
+                self.metriken.add(thetas[iterativ], "block", (time.perf_counter() - start) / iterativ.sum(), self.letzte_iterationen,
+                                  self.letzte_auswertungen, residuum, self.ist_konvergiert(residuum))
+            return positionen
+
+    def solve_iterativ(self, positionen, max_iter=LOESER_MAX_ITER, tol=LOESER_TOL, block_groesse=None):
+        # Iterationen und Residuenauswertungen je Winkel landen in letzte_iterationen bzw. letzte_auswertungen
+        iterationen = np.zeros(len(positionen), dtype=int)
+        auswertungen = np.zeros(len(positionen), dtype=int)
+        if self.num_freie_koordinaten >= DUENN_AB:
+            # Große Gestänge: dünnbesetzt Winkel für Winkel statt dichter (N, m, k)-Blöcke
+            for n in range(len(positionen)):
+                positionen[n], iterationen[n] = self.loese_positionen(positionen[n, self.rotating_gelenk_index], positionen[n, self.freie_indices], max_iter, tol)
+                auswertungen[n] = self.letzte_auswertungen
+        else:
+            if block_groesse is None:
+                block_groesse = max(1, min(512, 2 ** 22 // max(1, self.num_freie_koordinaten * (self.num_freie_koordinaten + len(self.staebe)))))
+            for start in range(0, len(positionen), block_groesse):
+                positionen[start:start + block_groesse] = self.loese_block(positionen[start:start + block_groesse], max_iter, tol)
+                iterationen[start:start + block_groesse] = self.letzte_iterationen
+                auswertungen[start:start + block_groesse] = self.letzte_iterationen + 1
+        self.letzte_iterationen = iterationen
+        self.letzte_auswertungen = auswertungen
+        return positionen
+
+    def loese_block(self, positionen, max_iter, tol):
+        form = (len(self.staebe), self.num_freie_koordinaten)
+        einheit = np.eye(self.num_freie_koordinaten)
+
+        def auswerten(positionen):
+            residuen, stab_vektoren, laengen = self.residuen(positionen)
+            return residuen, stab_vektoren, laengen, np.einsum('nm,nm->n', residuen, residuen)
+
+        positionen = positionen.copy()
+        residuen, stab_vektoren, laengen, kosten = auswerten(positionen)
+        daempfung = np.full(len(positionen), np.nan)
+        aktiv = np.arange(len(positionen))
+        iterationen = np.zeros(len(positionen), dtype=int)
+
+        for _ in range(max_iter):
+            if len(aktiv) == 0:
+                break
+            iterationen[aktiv] += 1
+            jacobi = np.zeros((len(aktiv),) + form)
+            jacobi[:, self.jacobi_zeilen, self.jacobi_spalten] = self.jacobi_werte(stab_vektoren[aktiv], laengen[aktiv])
+            jacobi_t = jacobi.transpose(0, 2, 1)
+            gradient = (jacobi_t @ residuen[aktiv][:, :, None])[:, :, 0]
+            normal_matrix = jacobi_t @ jacobi
+
+            neu = np.isnan(daempfung[aktiv])
+            if neu.any():
+                diagonale = np.diagonal(normal_matrix[neu], axis1=1, axis2=2)
+                daempfung[aktiv[neu]] = 1e-3 * np.maximum(diagonale.max(axis=1, initial=0.0), 1.0)
+
+            schritt = np.linalg.solve(normal_matrix + daempfung[aktiv, None, None] * einheit, -gradient[:, :, None])[:, :, 0]
+            versuch = positionen[aktiv].copy()
+            versuch[:, self.freie_indices] += schritt.reshape(len(aktiv), -1, 2)
+            neue_residuen, neue_stab_vektoren, neue_laengen, neue_kosten = auswerten(versuch)
+
+            besser = neue_kosten <= kosten[aktiv]
+            angenommen = aktiv[besser]
+            konvergiert = np.zeros(len(aktiv), dtype=bool)
+            konvergiert[besser] = (kosten[angenommen] - neue_kosten[besser] <= tol * kosten[angenommen]) | (
+                np.linalg.norm(schritt[besser], axis=1) <= tol * (1 + np.linalg.norm(versuch[besser].reshape(len(angenommen), 2 * len(self.gelenke)), axis=1)))
+            konvergiert |= np.max(np.abs(gradient), axis=1, initial=0.0) < tol
+
+            positionen[angenommen] = versuch[besser]
+            residuen[angenommen], stab_vektoren[angenommen], laengen[angenommen] = neue_residuen[besser], neue_stab_vektoren[besser], neue_laengen[besser]
+            kosten[angenommen] = neue_kosten[besser]
+            daempfung[angenommen] = np.maximum(daempfung[angenommen] / 10, 1e-15)
+            daempfung[aktiv[~besser]] *= 10
+
+            konvergiert |= daempfung[aktiv] > 1e12
+            aktiv = aktiv[~konvergiert]
+
+        self.letzte_iterationen = iterationen
+        return positionen
+
+    def kinematik(self, thetas, positionen=None, winkelgeschwindigkeit=1.0, winkelbeschleunigung=0.0):
+        # Geschwindigkeiten und Beschleunigungen aller Gelenke aus den abgeleiteten Zwangsbedingungen:
+        # u·(v_i - v_j) = 0 und u·(a_i - a_j) = -|v_i - v_j|² / L, je Winkel ein lineares System in den freien Koordinaten
+        thetas = np.atleast_1d(np.asarray(thetas, dtype=float))
+        if positionen is None:
+            positionen = self.solve_angles(thetas)
+        positionen = np.asarray(positionen, dtype=float).reshape(len(thetas), len(self.gelenke), 2)
+
+        stab_vektoren = self.stab_vektoren(positionen)
+        laengen = np.linalg.norm(stab_vektoren, axis=-1)
+        richtungen = stab_vektoren / np.where(laengen > 0, laengen, 1.0)[..., None]
+
+        # Vorgaben am Kurbelgelenk, das Festlager ruht
+        tangente = self.radius * np.stack([-np.sin(thetas), np.cos(thetas)], axis=-1)
+        radial = self.radius * np.stack([np.cos(thetas), np.sin(thetas)], axis=-1)
+        geschwindigkeiten = np.zeros_like(positionen)
+        beschleunigungen = np.zeros_like(positionen)
+        geschwindigkeiten[:, self.rotating_gelenk_index] = winkelgeschwindigkeit * tangente
+        beschleunigungen[:, self.rotating_gelenk_index] = winkelbeschleunigung * tangente - winkelgeschwindigkeit ** 2 * radial
+
+        if not self.freie_indices:
+            return geschwindigkeiten, beschleunigungen
+
+        loese = self.kinematik_loeser(stab_vektoren, laengen)
+
+        rechts = -np.einsum('nmk,nmk->nm', richtungen, geschwindigkeiten[:, self.i_idx] - geschwindigkeiten[:, self.j_idx])
+        geschwindigkeiten[:, self.freie_indices] = loese(rechts).reshape(len(thetas), -1, 2)
+
+        relativ = geschwindigkeiten[:, self.i_idx] - geschwindigkeiten[:, self.j_idx]
+        rechts = -(np.einsum('nmk,nmk->nm', richtungen, beschleunigungen[:, self.i_idx] - beschleunigungen[:, self.j_idx])
+                   + np.einsum('nmk,nmk->nm', relativ, relativ) / np.where(laengen > 0, laengen, 1.0))
+        beschleunigungen[:, self.freie_indices] = loese(rechts).reshape(len(thetas), -1, 2)
+
+        return geschwindigkeiten, beschleunigungen
+
+    def kinematik_loeser(self, stab_vektoren, laengen):
+        # Je Winkel einmal zerlegen und für Geschwindigkeit und Beschleunigung wiederverwenden
+        if self.num_freie_koordinaten >= DUENN_AB:
+            zerlegungen = []
+            for n in range(len(stab_vektoren)):
+                jacobi = self.jacobi_matrix(stab_vektoren[n], laengen[n])
+                # JᵀJ ist bei unterbestimmten Mechanismen oder in exakten Totlagen singulär; die kleine Regularisierung hält
+                # die Zerlegung lösbar und liefert wie die Pseudoinverse im dichten Zweig die Lösung mit minimaler Norm
+                normal_matrix = jacobi.T @ jacobi
+                regularisierung = KINEMATIK_REGULARISIERUNG * max(normal_matrix.diagonal().max(initial=0.0), 1.0)
+                zerlegungen.append((jacobi, splu((normal_matrix + regularisierung * sparse.identity(normal_matrix.shape[0])).tocsc())))
+
+            def loese(rechts):
+                return np.array([lu.solve(jacobi.T @ r) for (jacobi, lu), r in zip(zerlegungen, rechts)])
+            return loese
+
+        # Pseudoinverse (kleinste Quadrate), bleibt auch in Totlagen mit singulärer Jacobi-Matrix endlich
+        jacobi = np.zeros((len(stab_vektoren), len(self.staebe), self.num_freie_koordinaten))
+        jacobi[:, self.jacobi_zeilen, self.jacobi_spalten] = self.jacobi_werte(stab_vektoren, laengen)
+        pseudoinverse = np.linalg.pinv(jacobi)
+
+        def loese(rechts):
+            return (pseudoinverse @ rechts[:, :, None])[:, :, 0]
+        return loese
+
+    def gleiche_topologie(self, other):
+        return (other is not None and len(self.gelenke) == len(other.gelenke)
+                and self.fixed_gelenk_index == other.fixed_gelenk_index and self.rotating_gelenk_index == other.rotating_gelenk_index
+                and np.array_equal(self.i_idx, other.i_idx) and np.array_equal(self.j_idx, other.j_idx))
+
+    def gleiche_geometrie(self, other):
+        return (self.gleiche_topologie(other) and self.radius == other.radius and np.array_equal(self.koordinaten, other.koordinaten)
+                and all(g.is_tracked == h.is_tracked for g, h in zip(self.gelenke, other.gelenke)))
+
+    def vorhersage(self, vorher, tabelle, thetas):
+        # Sensitivität: linearisierte Stablängen-Bedingungen u·(dp_i - dp_j) = dL um die alte Lösung,
+        # angetrieben von geänderten Stablängen, verschobenem Festlager und Kurbelkreis
+        tabelle = np.array(tabelle, dtype=float)
+        stab_vektoren = vorher.stab_vektoren(tabelle)
+        laengen = np.linalg.norm(stab_vektoren, axis=-1)
+        richtungen = stab_vektoren / np.where(laengen > 0, laengen, 1.0)[..., None]
+
+        delta = np.zeros_like(tabelle)
+        delta[:, self.fixed_gelenk_index] = self.koordinaten[self.fixed_gelenk_index] - vorher.koordinaten[self.fixed_gelenk_index]
+        delta[:, self.rotating_gelenk_index] = self.rotationspunkte(thetas) - vorher.rotationspunkte(thetas)
+        if self.freie_indices:
+            rechts = (self.start_laengen - vorher.start_laengen) - np.einsum('nmk,nmk->nm', richtungen, delta[:, self.i_idx] - delta[:, self.j_idx])
+            delta[:, self.freie_indices] = vorher.kinematik_loeser(stab_vektoren, laengen)(rechts).reshape(len(thetas), -1, 2)
+        return tabelle + delta
+
+    def warmstart(self, vorher):
+        # Bei gleicher Topologie die gelösten Tabellen des Vorgängers vorhersagen und nur noch nachiterieren
+        if not self.gleiche_topologie(vorher):
+            return False
+        with self.loese_lock:
+            for aufloesung, tabelle in list(vorher.trajectory_tables.items()):
+                if aufloesung in self.trajectory_tables:
+                    continue
+                thetas = np.linspace(0, 2 * np.pi, aufloesung)
+                self.trajectory_tables[aufloesung] = self.solve_angles(thetas, self.vorhersage(vorher, tabelle, thetas))
+        return True
+
+    def update_positions(self, theta, initial_guess=None):
+        with self.loese_lock:
+            start = time.perf_counter()
+            rotationspunkt_neu = self.rotationspunkte(theta)
         
-        return optimized_positions
+            referenz = None
+            if initial_guess is None:
+                initial_guess = self.koordinaten[self.freie_indices]
+            else:
+                initial_guess = np.asarray(initial_guess)
+                if initial_guess.shape == (len(self.gelenke), 2):
+                    initial_guess = initial_guess[self.freie_indices]
+                referenz = self.koordinaten.copy()
+                referenz[self.freie_indices] = initial_guess.reshape(-1, 2)
+
+            if self.dyaden is not None:
+                geschlossen, gueltig = self.loese_dyaden(rotationspunkt_neu, referenz)
+                if gueltig[0]:
+                    self.letzte_iterationen = 0
+                    residuum = self.stellungs_residuum(geschlossen[0])
+                    self.metriken.add(theta, "dyade", time.perf_counter() - start, 0, 1, residuum, self.ist_konvergiert(residuum))
+                    return geschlossen[0]
+
+            optimized_positions, iterationen = self.loese_positionen(rotationspunkt_neu, initial_guess)
+            self.letzte_iterationen = iterationen
+
+            # Springt ein Gelenk weiter als einen halben kürzesten Stab vom Startwert weg, hat der Solver vermutlich den Zweig gewechselt
+            zweigwechsel = False
+            if referenz is not None:
+                sprung = np.linalg.norm(optimized_positions[self.freie_indices] - referenz[self.freie_indices], axis=1).max(initial=0.0)
+                zweigwechsel = sprung > 0.5 * self.start_laengen.min(initial=np.inf)
+            self.letzte_zweigwechsel = np.array([zweigwechsel])
+            residuum = self.stellungs_residuum(optimized_positions)
+            self.metriken.add(theta, "lm", time.perf_counter() - start, iterationen, self.letzte_auswertungen, residuum,
+                              self.ist_konvergiert(residuum), zweigwechsel)
+            return optimized_positions
+
+    def sweep(self, theta_values=None, max_iterationen=SWEEP_MAX_ITERATIONEN, max_halbierungen=SWEEP_MAX_HALBIERUNGEN):
+        # Kurbelwinkel der Reihe nach abfahren, jeweils mit der (extrapolierten) vorherigen Lösung als Startwert
+        with self.loese_lock:
+            if theta_values is None:
+                theta_values = self.theta_values
+
+            if self.dyaden is not None:
+                start = time.perf_counter()
+                positionen, gueltig = self.loese_dyaden(self.rotationspunkte(theta_values), fortlaufend=True)
+                if gueltig.all():
+                    self.letzte_iterationen = 0
+                    residuum = self.stellungs_residuum(positionen)
+                    self.metriken.add(theta_values, "dyade", (time.perf_counter() - start) / max(len(theta_values), 1), 0, 1,
+                                      residuum, self.ist_konvergiert(residuum), self.letzte_zweigwechsel)
+                    return positionen
+
+            stuetzstellen = []
+            ergebnisse = []
+            zweigwechsel = []
+            for theta in theta_values:
+                ziel = theta
+                halbierungen = 0
+                gewechselt = False
+                while True:
+                    startwert = self.extrapoliere_startwert(stuetzstellen, ziel)
+                    positionen = self.update_positions(ziel, startwert)
+                    gewechselt |= bool(self.letzte_zweigwechsel[0])
+
+                    schwierig = self.letzte_iterationen > max_iterationen and halbierungen < max_halbierungen
+                    if stuetzstellen and schwierig:
+                        # Schritt verkleinern und über einen Zwischenwinkel anlaufen
+                        ziel = (stuetzstellen[-1][0] + ziel) / 2
+                        halbierungen += 1
+                        continue
+
+                    stuetzstellen = stuetzstellen[-1:] + [(ziel, positionen)]
+                    if ziel == theta:
+                        break
+                    ziel = theta
+
+                ergebnisse.append(positionen)
+                zweigwechsel.append(gewechselt)
+
+            # Wie im geschlossenen Zweig ein Flag je angefragtem Winkel, Zwischenwinkel der Schrittweitenhalbierung eingerechnet
+            self.letzte_zweigwechsel = np.array(zweigwechsel, dtype=bool)
+            return np.array(ergebnisse)
+
+    def trajectory_table(self, aufloesung=None):
+        # Eine gelöste Tabelle (n_theta, n_gelenke, 2) je Winkelauflösung, von allen Ausgaben gemeinsam genutzt
+        if aufloesung is None:
+            aufloesung = len(self.theta_values)
+        if aufloesung in self.trajectory_tables:
+            return self.trajectory_tables[aufloesung]
+        with self.loese_lock:
+            if aufloesung in self.trajectory_tables:
+                return self.trajectory_tables[aufloesung]
+            # Unveränderte Geometrie wurde schon einmal gelöst: Tabelle direkt aus dem persistenten Cache abbilden
+            tabelle = self.gecachte_tabelle(aufloesung)
+            if tabelle is not None:
+                return tabelle
+
+            thetas = np.linspace(0, 2 * np.pi, aufloesung)
+            if aufloesung == len(self.theta_values):
+                self.trajectory_tables[aufloesung] = self.sweep(thetas)
+            else:
+                # Startwerte aus der Grundtabelle, dann alle Winkel gemeinsam nachiterieren
+                self.trajectory_tables[aufloesung] = self.solve_angles(thetas)
+            self.cache_tabelle(aufloesung)
+        return self.trajectory_tables[aufloesung]
+
+    def cache_schluessel(self, aufloesung, verfahren=None):
+        # Schlüssel aus den tatsächlich verwendeten Einstellungen; jedes Lösungsverfahren bekommt einen eigenen Eintrag
+        if verfahren is None:
+            verfahren = "sweep" if aufloesung == len(self.theta_values) else "solve_angles"
+        return self.ergebnis_cache.schluessel(self, aufloesung, verfahren=verfahren, basis=len(self.theta_values),
+                                              geschlossen=self.dyaden is not None, duenn_ab=DUENN_AB, max_iter=LOESER_MAX_ITER,
+                                              tol=LOESER_TOL, max_iterationen=SWEEP_MAX_ITERATIONEN, max_halbierungen=SWEEP_MAX_HALBIERUNGEN)
+
+    def gecachte_tabelle(self, aufloesung, verfahren=None):
+        if self.ergebnis_cache is None:
+            return None
+        tabelle = self.ergebnis_cache.lade(self.cache_schluessel(aufloesung, verfahren))
+        if tabelle is None or tabelle.shape != (aufloesung, len(self.gelenke), 2):
+            return None
+        self.trajectory_tables[aufloesung] = tabelle
+        return tabelle
+
+    def cache_tabelle(self, aufloesung, verfahren=None):
+        if self.ergebnis_cache is not None:
+            self.ergebnis_cache.speichere(self.cache_schluessel(aufloesung, verfahren), self.trajectory_tables[aufloesung])
+
+    def positions_at(self, thetas, aufloesung=None):
+        # Kubische (Catmull-Rom) Interpolation in der Tabelle, periodisch in theta
+        tabelle = self.trajectory_table(aufloesung)
+        zyklus = tabelle[:-1]
+        n = len(zyklus)
+        thetas = np.asarray(thetas, dtype=float)
+        stelle = np.mod(np.atleast_1d(thetas), 2 * np.pi) * n / (2 * np.pi)
+        index = np.floor(stelle).astype(int) % n
+        t = (stelle - np.floor(stelle))[:, None, None]
+
+        p0, p1, p2, p3 = (zyklus[(index + k) % n] for k in (-1, 0, 1, 2))
+        positionen = p1 + 0.5 * t * ((p2 - p0) + t * ((2 * p0 - 5 * p1 + 4 * p2 - p3) + t * (3 * (p1 - p2) + p3 - p0)))
+        return positionen[0] if thetas.ndim == 0 else positionen
+
+    def totpunkt_mass(self, positionen):
+        # Kondition der Jacobi-Matrix je Stellung; gegen 0 heißt Totlage (Stäbe gestreckt oder gedeckt, die Kurbel klemmt)
+        positionen = np.asarray(positionen, dtype=float).reshape(-1, len(self.gelenke), 2)
+        if self.num_freie_koordinaten == 0:
+            return np.ones(len(positionen))
+        stab_vektoren = self.stab_vektoren(positionen)
+        jacobi = np.zeros((len(positionen), len(self.staebe), self.num_freie_koordinaten))
+        jacobi[:, self.jacobi_zeilen, self.jacobi_spalten] = self.jacobi_werte(stab_vektoren, np.linalg.norm(stab_vektoren, axis=-1))
+        singulaerwerte = np.linalg.svd(jacobi[:, np.unique(self.jacobi_zeilen)], compute_uv=False)
+        return singulaerwerte[:, -1] / np.maximum(singulaerwerte[:, 0], np.finfo(float).tiny)
+
+    def adaptive_abtastung(self, toleranz=None, start_winkel=24, max_winkel=4096):
+        # Winkelraster dort halbieren, wo die gelöste Mitte von der kubischen Hermite-Vorhersage aus den Nachbarn
+        # (Positionen und analytische Geschwindigkeiten) abweicht oder die Montierbarkeit wechselt; glatte Abschnitte
+        # werden anschließend wieder ausgedünnt. Deutliche lokale Minima des Totpunktmaßes (relativ zum Median über den
+        # Zyklus, lange Ketten sind durchgehend schlecht konditioniert) werden bis TOTPUNKT_WINKEL eingegrenzt. Markiert
+        # werden Totlagen und Zweigsprünge (Sprünge, die auch beim kleinsten Schritt bleiben, ohne Totlage in der Nähe).
+        schluessel = (toleranz, start_winkel, max_winkel)
+        if schluessel in self.abtastungen:
+            return self.abtastungen[schluessel]
+        if toleranz is None:
+            toleranz = ABTAST_TOL * max(self.start_laengen.max(initial=0.0), 1.0)
+        min_schritt = 2 * np.pi / max_winkel
+        totpunkt_schritt = 2 * np.pi / TOTPUNKT_WINKEL
+
+        with self.loese_lock:
+            thetas = np.linspace(0, 2 * np.pi, start_winkel + 1)
+            positionen = self.trajectory_tables.get(start_winkel + 1)
+            if positionen is None:
+                positionen = self.sweep(thetas)
+            positionen = np.array(positionen)
+            geschwindigkeiten = self.kinematik(thetas, positionen)[0]
+            konvergiert = self.ist_konvergiert(self.stellungs_residuum(positionen))
+            mass = self.totpunkt_mass(positionen)
+            bezug = np.median(mass[konvergiert]) if konvergiert.any() else 1.0
+            loesungen = len(thetas)
+
+            offen = np.ones(len(thetas) - 1, dtype=bool)
+            ungeklaert = np.zeros(len(thetas) - 1, dtype=bool)
+            while offen.any():
+                links = np.flatnonzero(offen)
+                rechts = links + 1
+                mitte = (thetas[links] + thetas[rechts]) / 2
+                vorhersage = self.hermite(positionen[links], geschwindigkeiten[links], positionen[rechts], geschwindigkeiten[rechts],
+                                          thetas[rechts] - thetas[links], 0.5)
+                # Startwert bzw. Zweigwahl über die Sehne, die Hermite-Vorhersage schießt nahe Totlagen über
+                neu = self.solve_angles(mitte, (positionen[links] + positionen[rechts]) / 2)
+                neu_geschwindigkeiten = self.kinematik(mitte, neu)[0]
+                loesungen += len(mitte)
+
+                neu_konvergiert = self.ist_konvergiert(self.stellungs_residuum(neu))
+                alle = konvergiert[links] & konvergiert[rechts] & neu_konvergiert
+                gemischt = ~alle & (konvergiert[links] | konvergiert[rechts] | neu_konvergiert)
+                abweichung = np.linalg.norm(neu - vorhersage, axis=-1).max(axis=-1, initial=0.0)
+                weiter = gemischt | (alle & (abweichung > toleranz))
+                teilbar = mitte - thetas[links] > min_schritt
+
+                # Mittelpunkte einsortieren: das Intervall links zerfällt in die Hälften basis und basis + 1
+                basis = links + np.arange(len(links))
+                thetas = np.insert(thetas, rechts, mitte)
+                positionen = np.insert(positionen, rechts, neu, axis=0)
+                geschwindigkeiten = np.insert(geschwindigkeiten, rechts, neu_geschwindigkeiten, axis=0)
+                konvergiert = np.insert(konvergiert, rechts, neu_konvergiert)
+                mass = np.insert(mass, rechts, self.totpunkt_mass(neu))
+                ungeklaert = np.repeat(ungeklaert, np.where(offen, 2, 1))
+                offen = np.zeros(len(thetas) - 1, dtype=bool)
+                offen[basis] = offen[basis + 1] = weiter & teilbar
+                ungeklaert[basis] = ungeklaert[basis + 1] = weiter & ~teilbar
+
+                # Verdächtige Minima einschachteln: beide angrenzenden Intervalle teilen, bis das Minimum auf dem
+                # Totpunkt-Raster sitzt; das neue Minimum liegt danach wieder zwischen zwei Stützstellen
+                verdacht = np.flatnonzero(self.totpunkt_minima(mass / bezug, konvergiert, TOTPUNKT_VERDACHT))
+                eingrenzen = np.zeros(len(thetas) - 1, dtype=bool)
+                eingrenzen[np.mod(verdacht - 1, len(thetas) - 1)] = True
+                eingrenzen[verdacht[verdacht < len(thetas) - 1]] = True
+                offen |= eingrenzen & (np.diff(thetas) / 2 > totpunkt_schritt)
+
+            # Totlagen nur in montierbaren Stellungen (oder an deren Grenze); ein Zweigsprung ist ein Schritt, der deutlich weiter reicht, als die
+            # Geschwindigkeiten an seinen Enden erlauben (in Totlagen werden diese selbst groß)
+            totpunkt = self.totpunkt_minima(mass / bezug, konvergiert, TOTPUNKT_TOL)
+            zyklus = konvergiert[:-1]
+            grenze = zyklus & ~(np.roll(zyklus, 1) & np.roll(zyklus, -1))  # Grenze der Montierbarkeit
+            totpunkt |= np.append(grenze, grenze[0])
+            weg = np.linalg.norm(positionen[1:] - positionen[:-1], axis=-1)
+            erwartet = np.diff(thetas)[:, None] * np.maximum(np.linalg.norm(geschwindigkeiten[1:], axis=-1), np.linalg.norm(geschwindigkeiten[:-1], axis=-1))
+            sprung = ungeklaert & konvergiert[:-1] & konvergiert[1:] & (weg > 2 * erwartet + toleranz).any(axis=-1)
+            zweigsprung = np.concatenate([[False], sprung])
+
+            # Ausdünnen: innere Stützstellen entfernen, die auch die Interpolation zwischen ihren Nachbarn trifft;
+            # je Runde nur jede zweite, damit nie zwei Nachbarn gleichzeitig wegfallen
+            geschuetzt = totpunkt | zweigsprung | np.concatenate([sprung, [False]]) | ~konvergiert
+            runde, ohne_aenderung = 0, 0
+            while ohne_aenderung < 2 and len(thetas) > 3:
+                schritt = thetas[2:] - thetas[:-2]
+                interpoliert = self.hermite(positionen[:-2], geschwindigkeiten[:-2], positionen[2:], geschwindigkeiten[2:],
+                                            schritt, (thetas[1:-1] - thetas[:-2]) / schritt)
+                entbehrlich = np.linalg.norm(positionen[1:-1] - interpoliert, axis=-1).max(axis=-1, initial=0.0) < toleranz / 2
+                entbehrlich &= ~geschuetzt[1:-1] & ~geschuetzt[:-2] & ~geschuetzt[2:]
+                entbehrlich[runde % 2::2] = False
+                runde += 1
+                ohne_aenderung = 0 if entbehrlich.any() else ohne_aenderung + 1
+                behalten = np.concatenate([[True], ~entbehrlich, [True]])
+                thetas, positionen, geschwindigkeiten = thetas[behalten], positionen[behalten], geschwindigkeiten[behalten]
+                konvergiert, mass, totpunkt, zweigsprung, geschuetzt = (konvergiert[behalten], mass[behalten], totpunkt[behalten],
+                                                                        zweigsprung[behalten], geschuetzt[behalten])
+
+            self.abtastungen[schluessel] = {
+                "theta": thetas,
+                "positionen": positionen,
+                "geschwindigkeiten": geschwindigkeiten,
+                "konvergiert": konvergiert,
+                "totpunkt_mass": mass,
+                "totpunkt": totpunkt,
+                "zweigsprung": zweigsprung,
+                "loesungen": loesungen,
+            }
+        return self.abtastungen[schluessel]
+
+    @staticmethod
+    def totpunkt_minima(relativ, konvergiert, schwelle):
+        # Lokale Minima unter der Schwelle, nur in montierbaren Stellungen. Erste und letzte Stützstelle sind dieselbe
+        # Stellung: verglichen wird über einen Zyklus ohne die doppelte, deren Flag danach übernommen wird
+        zyklus = np.where(konvergiert, relativ, np.inf)[:-1]
+        minima = (zyklus < schwelle) & (zyklus <= np.roll(zyklus, 1)) & (zyklus <= np.roll(zyklus, -1))
+        return np.append(minima, minima[0])
+
+    def positions_adaptiv(self, thetas, toleranz=None):
+        # Kubische Hermite-Interpolation zwischen den adaptiven Stützstellen, periodisch in theta
+        abtastung = self.adaptive_abtastung(toleranz)
+        stuetzstellen = abtastung["theta"]
+        thetas = np.asarray(thetas, dtype=float)
+        stelle = np.mod(np.atleast_1d(thetas), 2 * np.pi)
+        rechts = np.clip(np.searchsorted(stuetzstellen, stelle, side="right"), 1, len(stuetzstellen) - 1)
+        links = rechts - 1
+        schritt = stuetzstellen[rechts] - stuetzstellen[links]
+        positionen = self.hermite(abtastung["positionen"][links], abtastung["geschwindigkeiten"][links],
+                                  abtastung["positionen"][rechts], abtastung["geschwindigkeiten"][rechts],
+                                  schritt, (stelle - stuetzstellen[links]) / schritt)
+        return positionen[0] if thetas.ndim == 0 else positionen
+
+    @staticmethod
+    def hermite(p0, v0, p1, v1, schritt, t):
+        # Kubischer Hermite-Spline je Intervall; v sind Ableitungen nach theta, schritt die Intervallbreite
+        t = np.broadcast_to(np.asarray(t, dtype=float), np.shape(schritt))[..., None, None]
+        schritt = np.asarray(schritt, dtype=float)[..., None, None]
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * p0 + (t3 - 2 * t2 + t) * schritt * v0
+                + (-2 * t3 + 3 * t2) * p1 + (t3 - t2) * schritt * v1)
+
+    @staticmethod
+    def extrapoliere_startwert(stuetzstellen, theta):
+        if not stuetzstellen:
+            return None
+        theta1, positionen1 = stuetzstellen[-1]
+        if len(stuetzstellen) < 2:
+            return positionen1
+        theta0, positionen0 = stuetzstellen[-2]
+        if theta1 == theta0:
+            return positionen1
+        return positionen1 + (positionen1 - positionen0) * (theta - theta1) / (theta1 - theta0)
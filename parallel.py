@@ -0,0 +1,55 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+_worker_mechanism = None
+
+def _init_worker(mechanism):
+    global _worker_mechanism
+    _worker_mechanism = mechanism
+
+def _solve_chunk(thetas, startwerte):
+    return _worker_mechanism.solve_angles(thetas, startwerte)
+
+def _simulate_by_name(name, aufloesung):
+    from database import load_mechanism_from_db
+    mechanism = load_mechanism_from_db(name)
+    if mechanism is None:
+        return None
+    return mechanism.trajectory_table(aufloesung)
+
+def parallel_solve_angles(mechanism, thetas, max_workers=None, chunks_per_worker=4):
+    # Winkelbereich aufteilen; die Startwerte kommen für alle Teile aus derselben Fortsetzungstabelle,
+    # damit an den Teilgrenzen kein Zweigwechsel entsteht
+    thetas = np.asarray(thetas, dtype=float)
+    max_workers = max_workers or os.cpu_count() or 1
+    startwerte = mechanism.positions_at(thetas)
+
+    num_chunks = min(len(thetas), max_workers * chunks_per_worker)
+    if max_workers == 1 or num_chunks <= 1:
+        return mechanism.solve_angles(thetas, startwerte)
+
+    grenzen = np.array_split(np.arange(len(thetas)), num_chunks)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(mechanism,)) as executor:
+        ergebnisse = executor.map(_solve_chunk, [thetas[g] for g in grenzen], [startwerte[g] for g in grenzen])
+        return np.concatenate(list(ergebnisse))
+
+def parallel_trajectory_table(mechanism, aufloesung, max_workers=None):
+    # Gleiches Sperrschema wie Mechanism.trajectory_table, damit ein Hintergrund-Solve nicht parallel dieselbe Tabelle schreibt
+    if aufloesung in mechanism.trajectory_tables:
+        return mechanism.trajectory_tables[aufloesung]
+    with mechanism.loese_lock:
+        if aufloesung not in mechanism.trajectory_tables and mechanism.gecachte_tabelle(aufloesung, "parallel_solve_angles") is None:
+            thetas = np.linspace(0, 2 * np.pi, aufloesung)
+            mechanism.trajectory_tables[aufloesung] = parallel_solve_angles(mechanism, thetas, max_workers)
+            mechanism.cache_tabelle(aufloesung, "parallel_solve_angles")
+        return mechanism.trajectory_tables[aufloesung]
+
+def map_mechanisms(funktion, *argumente, max_workers=None):
+    # funktion je Mechanismus in einem eigenen Prozess ausführen; Ergebnisse in Eingabereihenfolge, sobald sie vorliegen
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(funktion, *argumente)
+
+def simulate_mechanisms(names, aufloesung=None, max_workers=None):
+    # Mehrere gespeicherte Mechanismen gleichzeitig simulieren, je Mechanismus ein Prozess
+    return dict(zip(names, map_mechanisms(_simulate_by_name, names, [aufloesung] * len(names), max_workers=max_workers)))
@@ -0,0 +1,87 @@
+import hashlib
+import os
+import uuid
+import numpy as np
+
+CACHE_PATH = "trajectory_cache"
+MAX_BYTES = 256 * 1024 * 1024
+MAX_EINTRAEGE = 2000
+SOLVER_VERSION = 2  # erhöhen, sobald sich die Lösungen des Solvers ändern (Verfahren, Zweigwahl, Abbruchkriterien)
+
+class ErgebnisCache:
+    # Gelöste Trajektorientabellen als .npy-Dateien, Schlüssel ist ein Hash über Geometrie, Topologie und Solver-Einstellungen.
+    # Geladen wird per Memory-Map, verdrängt wird nach letztem Zugriff (mtime), sobald Größe oder Anzahl überschritten sind.
+    def __init__(self, pfad=CACHE_PATH, max_bytes=MAX_BYTES, max_eintraege=MAX_EINTRAEGE):
+        self.pfad = pfad
+        self.max_bytes = max_bytes
+        self.max_eintraege = max_eintraege
+
+    @staticmethod
+    def schluessel(mechanism, aufloesung, **einstellungen):
+        h = hashlib.sha256()
+        h.update(f"v{SOLVER_VERSION}|{aufloesung}|{mechanism.radius!r}|{mechanism.fixed_gelenk_index}|{mechanism.rotating_gelenk_index}".encode())
+        h.update(np.ascontiguousarray(mechanism.koordinaten, dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(mechanism.i_idx, dtype=np.int64).tobytes())
+        h.update(np.ascontiguousarray(mechanism.j_idx, dtype=np.int64).tobytes())
+        h.update(repr(sorted(einstellungen.items())).encode())
+        return h.hexdigest()
+
+    def datei(self, schluessel):
+        return os.path.join(self.pfad, schluessel + ".npy")
+
+    def lade(self, schluessel):
+        datei = self.datei(schluessel)
+        try:
+            tabelle = np.load(datei, mmap_mode="r")
+            os.utime(datei)
+        except (OSError, ValueError):
+            return None
+        return tabelle
+
+    def speichere(self, schluessel, tabelle):
+        # Erst in eine temporäre Datei schreiben und dann umbenennen, damit parallele Leser nie halbe Dateien sehen
+        try:
+            os.makedirs(self.pfad, exist_ok=True)
+            temp = os.path.join(self.pfad, f".{schluessel}.{uuid.uuid4().hex}.tmp")
+            with open(temp, "wb") as f:
+                np.save(f, np.ascontiguousarray(tabelle, dtype=np.float64))
+            os.replace(temp, self.datei(schluessel))
+        except OSError:
+            return
+        self.verdraengen()
+
+    def eintraege(self):
+        try:
+            with os.scandir(self.pfad) as it:
+                return [(e.stat().st_mtime, e.stat().st_size, e.path) for e in it if e.name.endswith(".npy")]
+        except OSError:
+            return []
+
+    def verdraengen(self):
+        eintraege = sorted(self.eintraege())
+        gesamt = sum(groesse for _, groesse, _ in eintraege)
+        anzahl = len(eintraege)
+        for _, groesse, datei in eintraege:
+            if gesamt <= self.max_bytes and anzahl <= self.max_eintraege:
+                break
+            try:
+                os.remove(datei)
+            except OSError:
+                continue
+            gesamt -= groesse
+            anzahl -= 1
+
+    def clear(self):
+        for _, _, datei in self.eintraege():
+            try:
+                os.remove(datei)
+            except OSError:
+                pass
+
+_standard_cache = None
+
+def standard_cache():
+    global _standard_cache
+    if _standard_cache is None:
+        _standard_cache = ErgebnisCache()
+    return _standard_cache
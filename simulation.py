@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from database import list_mechanism_names, get_mechanism_record, mechanism_from_record
+from trajectory_export import schreibe_trajektorie, verfuegbare_formate
+from diagnostics import diagnose_solve, bericht_json, metriken_csv
+from doe import studie, schreibe_ergebnisse
+from parallel import map_mechanisms
+
+# Simulation ohne Oberfläche: Mechanismen aus der Datenbank oder aus exportierten JSON-Dateien laden, lösen und
+# Trajektorien, Messwerte oder Animationen schreiben. matplotlib wird nur für Animationen geladen, Streamlit nie.
+
+def load_json_records(pfad):
+    # Exportformat {"mechanisms": {"1": {...}, ...}} (auch die alte TinyDB-Datei) oder ein einzelner Mechanismus
+    with open(pfad, encoding="utf-8") as f:
+        daten = json.load(f)
+    records = list(daten.get("mechanisms", {}).values()) if "mechanisms" in daten else [daten]
+    name = os.path.splitext(os.path.basename(pfad))[0]
+    return [(record.get("name") or (name if len(records) == 1 else f"{name}_{i}"), record) for i, record in enumerate(records, 1)]
+
+def load_records(quellen=(), alle=False):
+    records = []
+    if alle:
+        records.extend((name, get_mechanism_record(name)) for name in list_mechanism_names())
+    for quelle in quellen:
+        if quelle.lower().endswith(".json") and os.path.exists(quelle):
+            records.extend(load_json_records(quelle))
+        else:
+            record = get_mechanism_record(quelle)
+            if record is None:
+                raise ValueError(f"Mechanismus '{quelle}' nicht gefunden")
+            records.append((quelle, record))
+    return records
+
+def simulate_record(name, record, ausgabe=".", aufloesung=None, trajektorie=None, winkel=None, metriken=False, animation=None, fps=10,
+                    adaptiv=False):
+    mechanism = mechanism_from_record(record)
+    start = time.perf_counter()
+    if metriken:
+        # Für belastbare Messwerte ohne Ergebnis-Cache frisch lösen
+        bericht = diagnose_solve(mechanism, aufloesung)
+    else:
+        mechanism.trajectory_table(aufloesung)
+    dateien = []
+
+    if trajektorie:
+        datei = os.path.join(ausgabe, f"{name}_trajektorie.{trajektorie}")
+        with open(datei, "wb") as f:
+            schreibe_trajektorie(f, mechanism, trajektorie, winkel or len(mechanism.trajectory_table(aufloesung)), nur_tracked=False,
+                                 adaptiv=adaptiv)
+        dateien.append(datei)
+
+    if metriken:
+        datei = os.path.join(ausgabe, f"{name}_diagnose.json")
+        with open(datei, "wb") as f:
+            f.write(bericht_json(bericht))
+        dateien.append(datei)
+        datei = os.path.join(ausgabe, f"{name}_metriken.csv")
+        with open(datei, "wb") as f:
+            f.write(metriken_csv(mechanism.metriken.as_array()))
+        dateien.append(datei)
+
+    if animation:
+        import matplotlib
+        matplotlib.use("Agg")
+        from export import mechanism_animation_bytes
+        datei = os.path.join(ausgabe, f"{name}.{animation}")
+        with open(datei, "wb") as f:
+            f.write(mechanism_animation_bytes(mechanism, animation, fps))
+        dateien.append(datei)
+
+    zusammenfassung = mechanism.metriken.zusammenfassung()
+    return {
+        "name": name,
+        "zeit": time.perf_counter() - start,
+        "winkel": zusammenfassung["winkel"],
+        "nicht_konvergiert": zusammenfassung["nicht_konvergiert"],
+        "zweigwechsel": zusammenfassung["zweigwechsel"],
+        "dateien": dateien,
+    }
+
+def _simulate_safe(name, record, optionen):
+    try:
+        return simulate_record(name, record, **optionen)
+    except Exception as fehler:
+        return {"name": name, "fehler": f"{type(fehler).__name__}: {fehler}"}
+
+def simulate_all(records, jobs=1, **optionen):
+    # Mehrere Mechanismen nacheinander oder über einen Prozesspool; Fehler einzelner Mechanismen brechen den Lauf nicht ab
+    if jobs == 1 or len(records) < 2:
+        yield from (_simulate_safe(name, record, optionen) for name, record in records)
+        return
+    yield from map_mechanisms(_simulate_safe, *zip(*records), [optionen] * len(records), max_workers=jobs)
+
+def parameter_bereich(text):
+    # "radius=8:12" bzw. "G3.x=-25:-20"
+    name, _, bereich = text.partition("=")
+    try:
+        unten, oben = (float(wert) for wert in bereich.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' ist kein Bereich der Form NAME=MIN:MAX")
+    return name, (unten, oben)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mechanismen ohne Oberfläche simulieren")
+    unterbefehle = parser.add_subparsers(dest="befehl", required=True)
+    unterbefehle.add_parser("list", help="gespeicherte Mechanismen auflisten")
+
+    run = unterbefehle.add_parser("run", help="Mechanismen lösen und Ergebnisse schreiben")
+    run.add_argument("quellen", nargs="*", help="Namen aus der Datenbank oder exportierte JSON-Dateien")
+    run.add_argument("--alle", action="store_true", help="alle Mechanismen der Datenbank simulieren")
+    run.add_argument("--ausgabe", default=".", help="Zielverzeichnis")
+    run.add_argument("--aufloesung", type=int, default=None, help="Winkelauflösung der gelösten Tabelle (Standard 72)")
+    run.add_argument("--trajektorie", choices=verfuegbare_formate(), help="Trajektorien in diesem Format schreiben")
+    run.add_argument("--winkel", type=int, default=None, help="Anzahl Kurbelwinkel im Trajektorienexport")
+    run.add_argument("--adaptiv", action="store_true", help="Trajektorien aus der adaptiven Abtastung interpolieren statt jeden Winkel zu lösen")
+    run.add_argument("--metriken", action="store_true", help="Diagnosebericht (JSON) und Solver-Messwerte (CSV) schreiben")
+    run.add_argument("--animation", choices=["gif", "mp4", "webm"], help="Animation in diesem Format schreiben")
+    run.add_argument("--fps", type=int, default=10)
+    run.add_argument("--jobs", type=int, default=1, help="Anzahl paralleler Prozesse")
+
+    versuche = unterbefehle.add_parser("doe", help="Parametervarianten eines Mechanismus gemeinsam lösen (Gitter oder Latin Hypercube)")
+    versuche.add_argument("basis", help="Name aus der Datenbank oder exportierte JSON-Datei")
+    versuche.add_argument("--parameter", type=parameter_bereich, action="append", required=True,
+                          help="NAME=MIN:MAX mit NAME radius, G<i>.x, G<i>.y oder S<i> (Stablänge); mehrfach angeben")
+    plan = versuche.add_mutually_exclusive_group(required=True)
+    plan.add_argument("--stufen", type=int, help="vollständiges Gitter mit dieser Stufenzahl je Parameter")
+    plan.add_argument("--lhs", type=int, help="Anzahl Varianten im Latin Hypercube")
+    versuche.add_argument("--seed", type=int, default=None)
+    versuche.add_argument("--winkel", type=int, default=72, help="Kurbelwinkel je Variante")
+    versuche.add_argument("--format", choices=verfuegbare_formate(), default="csv")
+    versuche.add_argument("--ausgabe", default=None, help="Zieldatei (Standard: <basis>_doe.<format>)")
+    args = parser.parse_args(argv)
+
+    if args.befehl == "list":
+        for name in list_mechanism_names():
+            print(name)
+        return 0
+
+    if args.befehl == "doe":
+        return doe_main(parser, args)
+
+    try:
+        records = load_records(args.quellen, args.alle)
+    except (OSError, ValueError) as fehler:
+        parser.error(str(fehler))
+    if not records:
+        parser.error("keine Mechanismen angegeben (Namen, JSON-Dateien oder --alle)")
+    os.makedirs(args.ausgabe, exist_ok=True)
+
+    fehlgeschlagen = 0
+    for ergebnis in simulate_all(records, args.jobs, ausgabe=args.ausgabe, aufloesung=args.aufloesung, trajektorie=args.trajektorie,
+                                 winkel=args.winkel, metriken=args.metriken, animation=args.animation, fps=args.fps,
+                                 adaptiv=args.adaptiv):
+        if "fehler" in ergebnis:
+            fehlgeschlagen += 1
+            print(f"{ergebnis['name']}: FEHLER {ergebnis['fehler']}", file=sys.stderr)
+            continue
+        print(f"{ergebnis['name']}: {ergebnis['winkel']} Winkel in {ergebnis['zeit'] * 1000:.1f} ms, "
+              f"{ergebnis['nicht_konvergiert']} nicht konvergiert, {ergebnis['zweigwechsel']} Zweigwechsel")
+        for datei in ergebnis["dateien"]:
+            print(f"  {datei}")
+    return 1 if fehlgeschlagen else 0
+
+def doe_main(parser, args):
+    try:
+        (name, record), *_ = load_records([args.basis])
+        start = time.perf_counter()
+        ergebnisse = studie(mechanism_from_record(record), dict(args.parameter), stufen=args.stufen, anzahl=args.lhs,
+                            seed=args.seed, num_winkel=args.winkel)
+    except (OSError, ValueError) as fehler:
+        parser.error(str(fehler))
+    dauer = time.perf_counter() - start
+
+    datei = args.ausgabe or f"{name}_doe.{args.format}"
+    with open(datei, "wb") as f:
+        schreibe_ergebnisse(f, ergebnisse, args.format)
+    anzahl = len(ergebnisse["montierbar"])
+    print(f"{name}: {anzahl} Varianten in {dauer * 1000:.1f} ms, {int(ergebnisse['montierbar'].sum())} montierbar")
+    print(f"  {datei}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import differential_evolution, minimize
+
+from mechanism import Mechanism, Gelenk, Stab
+
+STRAFE_RESIDUUM = 100.0  # Gewicht der Stablängenfehler nicht montierbarer Stellungen in der Zielfunktion
+KOSTEN_UNGUELTIG = 1e12
+POWELL_AUSWERTUNGEN = 20  # je Parameter; die Verfeinerung läuft seriell im Hauptprozess
+
+def lade_zielpfad(datei):
+    # CSV mit Spalten x/y (beliebige Groß-/Kleinschreibung, auch X6/Y6 aus dem Trajektorienexport), sonst die ersten beiden Zahlenspalten
+    import pandas as pd
+    tabelle = pd.read_csv(datei).select_dtypes("number")
+    spalten = {name.lower(): name for name in tabelle.columns}
+    if "x" in spalten and "y" in spalten:
+        x, y = spalten["x"], spalten["y"]
+    else:
+        xs = [name for name in tabelle.columns if str(name).upper().startswith("X")]
+        ys = [name for name in tabelle.columns if str(name).upper().startswith("Y")]
+        if xs and ys:
+            x, y = xs[0], ys[0]
+        elif tabelle.shape[1] >= 2:
+            x, y = tabelle.columns[:2]
+        else:
+            raise ValueError("Die CSV-Datei braucht mindestens zwei Zahlenspalten (x, y)")
+    return tabelle[[x, y]].dropna().to_numpy(dtype=float)
+
+def abstand_zu_polygon(punkte, polygon):
+    # Kleinster Abstand jedes Punktes zum geschlossenen Polygonzug (Punkt-Strecke, vektorisiert)
+    start = polygon
+    richtung = np.roll(polygon, -1, axis=0) - start
+    laenge_quadrat = np.einsum('ij,ij->i', richtung, richtung)
+    relativ = punkte[:, None, :] - start[None, :, :]
+    t = np.clip(np.einsum('nmk,mk->nm', relativ, richtung) / np.where(laenge_quadrat > 0, laenge_quadrat, 1.0), 0.0, 1.0)
+    naechster = start[None] + t[..., None] * richtung[None]
+    return np.linalg.norm(punkte[:, None, :] - naechster, axis=-1).min(axis=1)
+
+class SyntheseProblem:
+    # Parametervektor: x/y der freien Gelenke, danach der Kurbelradius. Topologie und Fest-/Kurbelgelenk bleiben fest.
+    def __init__(self, mechanism, zielpfad, gelenk_index=None, num_winkel=72, spanne=None, radius_grenzen=None, cache_groesse=4096):
+        self.punkte = mechanism.koordinaten.copy()
+        self.kanten = [(int(i), int(j)) for i, j in zip(mechanism.i_idx, mechanism.j_idx)]
+        self.flags = [(g.is_static, g.is_rotating, g.is_tracked) for g in mechanism.gelenke]
+        self.freie_indices = list(mechanism.freie_indices)
+        self.gelenk_index = mechanism.selected_trajectory if gelenk_index is None else gelenk_index
+        self.zielpfad = np.asarray(zielpfad, dtype=float).reshape(-1, 2)
+        self.num_winkel = num_winkel
+
+        if spanne is None:
+            spanne = 0.25 * max(np.ptp(self.punkte, axis=0).max(), mechanism.radius)
+        if radius_grenzen is None:
+            radius_grenzen = (0.5 * mechanism.radius, 1.5 * mechanism.radius)
+        self.grenzen = [(wert - spanne, wert + spanne) for wert in self.punkte[self.freie_indices].ravel()] + [tuple(radius_grenzen)]
+        self.start = np.append(self.punkte[self.freie_indices].ravel(), mechanism.radius)
+
+        self.cache = OrderedDict()
+        self.cache_groesse = cache_groesse
+        self.treffer = 0
+        self.auswertungen = 0
+
+    def mechanism(self, x):
+        punkte = self.punkte.copy()
+        punkte[self.freie_indices] = np.asarray(x[:-1], dtype=float).reshape(-1, 2)
+        gelenke = [Gelenk(p[0], p[1], *flags) for p, flags in zip(punkte, self.flags)]
+        mechanism = Mechanism(gelenke, [Stab(gelenke[i], gelenke[j]) for i, j in self.kanten], float(x[-1]))
+        mechanism.theta_values = np.linspace(0, 2 * np.pi, self.num_winkel)
+        return mechanism
+
+    def kosten(self, x):
+        # Gleiche Geometrien (z. B. beim Verfeinern oder wiederholten Kandidaten) kommen aus dem Cache
+        schluessel = np.round(np.asarray(x, dtype=float), 10).tobytes()
+        if schluessel in self.cache:
+            self.cache.move_to_end(schluessel)
+            self.treffer += 1
+            return self.cache[schluessel]
+
+        self.auswertungen += 1
+        wert = self.bewerte(x)
+        self.cache[schluessel] = wert
+        if len(self.cache) > self.cache_groesse:
+            self.cache.popitem(last=False)
+        return wert
+
+    def bewerte(self, x):
+        try:
+            mechanism = self.mechanism(x)
+            if mechanism.dyaden is not None:
+                # Geschlossen lösbare Topologie: nicht montierbare Kandidaten direkt verwerfen statt iterativ zu sweepen,
+                # die Strafe wächst mit dem Anteil der Winkel ohne Kreisschnitt
+                tabelle, gueltig = mechanism.loese_dyaden(mechanism.rotationspunkte(mechanism.theta_values), fortlaufend=True)
+                if not gueltig.all():
+                    return KOSTEN_UNGUELTIG * np.mean(~gueltig)
+            else:
+                tabelle = mechanism.trajectory_table()
+        except (ValueError, np.linalg.LinAlgError):
+            return KOSTEN_UNGUELTIG
+        bahn = tabelle[:-1, self.gelenk_index]
+        if not np.isfinite(bahn).all():
+            return KOSTEN_UNGUELTIG
+
+        # Symmetrischer Kurvenabstand: Zielpunkte zur Bahn und Bahnpunkte zum Zielpfad, dazu Strafe für Stablängenfehler
+        abstand = np.mean(abstand_zu_polygon(self.zielpfad, bahn) ** 2) + np.mean(abstand_zu_polygon(bahn, self.zielpfad) ** 2)
+        strafe = STRAFE_RESIDUUM * np.mean(mechanism.stellungs_residuum(tabelle) ** 2)
+        return float(abstand + strafe)
+
+_worker_problem = None
+
+def _init_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+def _worker_kosten(x):
+    return _worker_problem.kosten(x)
+
+def synthesize(mechanism, zielpfad, gelenk_index=None, max_generationen=100, population=15, max_workers=None, seed=None,
+               spanne=None, radius_grenzen=None, verfeinern=True, fortschritt=None):
+    # Differential Evolution über Gelenkkoordinaten und Kurbelradius; jede Generation wird als Batch auf die Prozesse verteilt,
+    # danach optional eine lokale Verfeinerung (Powell) im Hauptprozess
+    problem = SyntheseProblem(mechanism, zielpfad, gelenk_index, spanne=spanne, radius_grenzen=radius_grenzen)
+    kosten_start = problem.kosten(problem.start)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    generation = [0]
+
+    def rueckmeldung(xk, convergence=None):
+        generation[0] += 1
+        if fortschritt is not None:
+            return bool(fortschritt(generation[0], max_generationen, problem.kosten(xk)))
+        return False
+
+    optionen = dict(maxiter=max_generationen, popsize=population, seed=seed, x0=problem.start, tol=1e-8, polish=False, callback=rueckmeldung)
+    if max_workers == 1:
+        ergebnis = differential_evolution(problem.kosten, problem.grenzen, **optionen)
+        auswertungen = problem.auswertungen
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(problem,)) as executor:
+            # Eine Generation in wenigen großen Paketen statt Kandidat für Kandidat verschicken
+            def verteilen(funktion, kandidaten):
+                kandidaten = list(kandidaten)
+                return executor.map(funktion, kandidaten, chunksize=max(1, -(-len(kandidaten) // max_workers)))
+            ergebnis = differential_evolution(_worker_kosten, problem.grenzen, workers=verteilen, updating="deferred", **optionen)
+        auswertungen = ergebnis.nfev
+
+    x = ergebnis.x
+    if verfeinern:
+        # Powell nutzt den Prozesspool nicht; die Auswertungen sind begrenzt, damit die Verfeinerung kurz bleibt
+        lokal = minimize(problem.kosten, x, method="Powell", bounds=problem.grenzen,
+                         options={"xtol": 1e-6, "ftol": 1e-10, "maxfev": POWELL_AUSWERTUNGEN * len(x)})
+        if lokal.fun < problem.kosten(x):
+            x = lokal.x
+        auswertungen += lokal.nfev
+
+    return {
+        "mechanism": problem.mechanism(x),
+        "kosten": problem.kosten(x),
+        "kosten_start": kosten_start,
+        "generationen": generation[0],
+        "auswertungen": auswertungen,
+        "cache_treffer": problem.treffer,
+        "gelenk_index": problem.gelenk_index,
+    }
@@ -0,0 +1,87 @@
+from io import BytesIO
+
+import numpy as np
+
+CHUNK_GROESSE = 16384
+FORMATE = {
+    "csv": ("trajektorie.csv", "text/csv"),
+    "parquet": ("trajektorie.parquet", "application/vnd.apache.parquet"),
+    "feather": ("trajektorie.feather", "application/vnd.apache.arrow.file"),
+    "npy": ("trajektorie.npy", "application/octet-stream"),
+}
+
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def verfuegbare_formate():
+    if pyarrow_available():
+        return list(FORMATE)
+    return ["csv", "npy"]
+
+def trajektorie_spalten(mechanism, nur_tracked=True):
+    if nur_tracked:
+        indices = [i for i, g in enumerate(mechanism.gelenke) if g.is_tracked]
+    else:
+        indices = list(range(len(mechanism.gelenke)))
+    spalten = ["Theta (Grad)"]
+    for i in indices:
+        spalten.extend([f"X{i}", f"Y{i}"])
+    return np.array(indices, dtype=int), spalten
+
+def trajektorie_bloecke(mechanism, num_winkel=50, nur_tracked=True, chunk_groesse=CHUNK_GROESSE, adaptiv=False):
+    # Blockweise lösen: jede Zeile ist [Theta in Grad, X, Y, X, Y, ...]; der Speicher wächst nur mit der Blockgröße.
+    # Mit adaptiv=True wird nicht jeder Winkel gelöst, sondern zwischen den adaptiven Stützstellen interpoliert
+    indices, _ = trajektorie_spalten(mechanism, nur_tracked)
+    thetas = np.linspace(0, 2 * np.pi, num_winkel)
+    for start in range(0, num_winkel, chunk_groesse):
+        block_thetas = thetas[start:start + chunk_groesse]
+        if adaptiv:
+            positionen = mechanism.positions_adaptiv(block_thetas)
+        else:
+            positionen = mechanism.solve_angles(block_thetas)
+        positionen = positionen[:, indices].reshape(len(block_thetas), -1)
+        yield np.column_stack([np.degrees(block_thetas), positionen])
+
+def schreibe_csv(datei, mechanism, num_winkel=50, nur_tracked=True, dezimalen=2, chunk_groesse=CHUNK_GROESSE, adaptiv=False):
+    _, spalten = trajektorie_spalten(mechanism, nur_tracked)
+    datei.write((",".join(spalten) + "\n").encode("utf-8"))
+    for block in trajektorie_bloecke(mechanism, num_winkel, nur_tracked, chunk_groesse, adaptiv):
+        puffer = BytesIO()
+        np.savetxt(puffer, block, fmt=f"%.{dezimalen}f", delimiter=",")
+        datei.write(puffer.getvalue())
+
+def schreibe_npy(datei, mechanism, num_winkel=50, nur_tracked=True, chunk_groesse=CHUNK_GROESSE, adaptiv=False):
+    # Kopf mit der Endgröße vorab schreiben, danach die Blöcke roh anhängen
+    _, spalten = trajektorie_spalten(mechanism, nur_tracked)
+    kopf = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False, "shape": (num_winkel, len(spalten))}
+    np.lib.format.write_array_header_1_0(datei, kopf)
+    for block in trajektorie_bloecke(mechanism, num_winkel, nur_tracked, chunk_groesse, adaptiv):
+        datei.write(np.ascontiguousarray(block, dtype=np.float64).tobytes())
+
+def schreibe_arrow(datei, mechanism, format="parquet", num_winkel=50, nur_tracked=True, chunk_groesse=CHUNK_GROESSE, adaptiv=False):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    _, spalten = trajektorie_spalten(mechanism, nur_tracked)
+    schema = pa.schema([(name, pa.float64()) for name in spalten])
+    if format == "parquet":
+        writer = pq.ParquetWriter(datei, schema)
+    else:
+        writer = pa.ipc.new_file(datei, schema)
+    with writer:
+        for block in trajektorie_bloecke(mechanism, num_winkel, nur_tracked, chunk_groesse, adaptiv):
+            writer.write_batch(pa.RecordBatch.from_arrays([pa.array(block[:, k]) for k in range(block.shape[1])], schema=schema))
+
+def schreibe_trajektorie(datei, mechanism, format="csv", num_winkel=50, nur_tracked=True, chunk_groesse=CHUNK_GROESSE, adaptiv=False):
+    if format == "csv":
+        schreibe_csv(datei, mechanism, num_winkel, nur_tracked, chunk_groesse=chunk_groesse, adaptiv=adaptiv)
+    elif format == "npy":
+        schreibe_npy(datei, mechanism, num_winkel, nur_tracked, chunk_groesse, adaptiv)
+    elif format in ("parquet", "feather"):
+        schreibe_arrow(datei, mechanism, format, num_winkel, nur_tracked, chunk_groesse, adaptiv)
+    else:
+        raise ValueError(f"Unbekanntes Exportformat: {format}")
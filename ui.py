@@ -2,21 +2,21 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation, PillowWriter
-from database import save_mechanism_to_db, load_mechanism_from_db
+from database import save_mechanism_to_db, load_mechanism_from_db, list_mechanism_names, mechanism_exists, delete_mechanism_from_db, get_mechanism_record, export_record
 from mechanism import Mechanism, Gelenk, Stab
-from animation import animate_mechanism, visualize_mechanism
-from tinydb import TinyDB, Query
-import tempfile
+from animation import animate_mechanism, visualize_mechanism, create_preview_figure
+from web_player import mechanism_player_html
+from diagnostics import diagnose_solve, bericht_json, metriken_csv, metriken_tabelle
+from trajectory_export import schreibe_trajektorie, verfuegbare_formate, FORMATE
+from synthesis import synthesize, lade_zielpfad
+from export import mechanism_animation_bytes, render_frames, encode_gif, ffmpeg_available
 import json
+import tempfile
 from streamlit_modal import Modal
 import qrcode
 from io import BytesIO
 import base64
 
-db = TinyDB("mechanism_db.json")
-mechanisms_table = db.table("mechanisms")
-
 # Anleitungsfenster
 open_modal = st.button("ℹ️ Anleitung anzeigen")
 
@@ -76,6 +76,50 @@ if modal.is_open():
         """)
 
 
+# Export nur aus dem gespeicherten Datensatz; id und Revision im Schlüssel sorgen dafür, dass nach jedem Speichern neu erzeugt wird
+@st.cache_data(max_entries=64, show_spinner=False)
+def export_json(name, record_id, revision):
+    record = get_mechanism_record(name)
+    return json.dumps(export_record(name, record), indent=4) if record is not None else None
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def export_qr_base64(name, record_id, revision):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=2,
+        border=4,
+    )
+    qr.add_data(export_json(name, record_id, revision))
+    qr.make(fit=True)
+    img = qr.make_image(fill='black', back_color='white')
+
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def synthese_vorgaben(name, record_id, revision):
+    # Ausgangsbahn, vorbelegter Zielpfad und Suchbereich je gespeicherter Revision nur einmal lösen, nicht bei jedem Rerun
+    mechanism = load_mechanism_from_db(name)
+    k = mechanism.selected_trajectory
+    zielpunkte = mechanism.positions_at(np.linspace(0, 2 * np.pi, 24, endpoint=False))[:, k]
+    spanne = float(0.25 * max(np.ptp(mechanism.koordinaten, axis=0).max(), mechanism.radius))
+    return zielpunkte, mechanism.trajectory_table()[:, k], spanne
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def preview_png(punkte, kanten, radius):
+    # Vorschaubild nur bei geänderter Geometrie neu zeichnen
+    gelenke = [Gelenk(x, y) for x, y in punkte]
+    fig = create_preview_figure(gelenke, [Stab(gelenke[i], gelenke[j]) for i, j in kanten], radius)
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
 st.title("Interaktive Mechanismus-Simulation")
 
 # Initialize session state for mechanism
@@ -96,7 +140,9 @@ selected_tab = st.tabs(["💾 Erstellung",
                         "📥⬆️ Export/Import", 
                         "🎞️ GIF",
                         "📜 Stückliste",
-                        "🏎️ Geschwindigkeit"])
+                        "🏎️ Geschwindigkeit",
+                        "🩺 Diagnose",
+                        "🎯 Synthese"])
 
 ####################################################################################################################
 
@@ -128,15 +174,38 @@ with selected_tab[0]:
         stab_df = st.data_editor(stab_data, num_rows="dynamic")
 
     with col2:
-        gelenke = [Gelenk(row["X-Koordinate"], row["Y-Koordinate"], row["Fixiert"], row["Rotierend"], row["Trajektorie"]) for _, row in gelenke_df.iterrows()]
-        staebe = [Stab(gelenke[row["Gelenk 1"]], gelenke[row["Gelenk 2"]]) for _, row in stab_df.iterrows()]
-        visualize_mechanism(gelenke, staebe, radius)
+        gelenke = [Gelenk(x, y, fixiert, rotierend, trajektorie) for x, y, fixiert, rotierend, trajektorie in zip(
+            gelenke_df["X-Koordinate"], gelenke_df["Y-Koordinate"], gelenke_df["Fixiert"], gelenke_df["Rotierend"], gelenke_df["Trajektorie"])]
+        kanten = tuple(zip(stab_df["Gelenk 1"], stab_df["Gelenk 2"]))
+        staebe = [Stab(gelenke[i], gelenke[j]) for i, j in kanten]
+        st.image(preview_png(tuple((g.x, g.y) for g in gelenke), kanten, radius))
+
+    # Interaktiver Modus: nur bei geänderter Geometrie neu lösen, und zwar ausgehend von der vorherigen Lösung
+    try:
+        editor_mechanism = Mechanism(gelenke, staebe, radius)
+    except ValueError as e:
+        editor_mechanism = None
+        editor_fehler = str(e)
+    vorher = st.session_state.get("editor_mechanism")
+    if editor_mechanism is not None:
+        if editor_mechanism.gleiche_geometrie(vorher):
+            editor_mechanism = vorher
+        elif vorher is not None:
+            editor_mechanism.warmstart(vorher)
+        st.session_state["editor_mechanism"] = editor_mechanism
     
     mechanism_name = st.text_input("Mechanismusname eingeben", value="Mein Mechanismus")
     
+    # Speichern überschreibt gleichnamige Einträge, daher nur nach ausdrücklicher Bestätigung
+    vorhanden = mechanism_exists(mechanism_name)
+    ueberschreiben = vorhanden and st.checkbox(f"Vorhandenen Mechanismus '{mechanism_name}' überschreiben", key="ueberschreiben_tab0")
+
     if st.button("Speichern"):
-        save_mechanism_to_db(mechanism_name, gelenke, staebe, radius)
-        st.success(f"✅ Mechanismus '{mechanism_name}' gespeichert!")
+        if vorhanden and not ueberschreiben:
+            st.warning(f"⚠️ Mechanismus '{mechanism_name}' existiert bereits in der Datenbank! Zum Ersetzen das Überschreiben bestätigen.")
+        else:
+            save_mechanism_to_db(mechanism_name, gelenke, staebe, radius)
+            st.success(f"✅ Mechanismus '{mechanism_name}' gespeichert!")
 
     if "show_length_error_tab0" not in st.session_state:
         st.session_state["show_length_error_tab0"] = False
@@ -148,27 +217,40 @@ with selected_tab[0]:
     show_length_error = st.toggle("Prozentualen Längenfehler anzeigen", key="show_length_error_tab0")
     show_stab_lengths = st.toggle("Längen der Stäbe anzeigen", key="show_stab_lengths_tab0")
     show_stab_angles = st.toggle("Winkel zwischen den Stäben anzeigen", key="show_stab_angles_tab0")
+    vector_animation = st.toggle("Schnelle Vektor-Animation im Browser", value=True, key="vector_animation_tab0")
+    live_preview = st.toggle("Live-Vorschau der Bewegung beim Bearbeiten", value=False, key="live_preview_tab0")
 
     if show_length_error and show_stab_lengths:
         st.warning("Warnung: Wenn sowohl 'Prozentualen Längenfehler anzeigen' als auch 'Längen der Stäbe anzeigen' aktiviert sind, können sich die Zahlen in der Visualisierung überlappen.")
+
+    if live_preview and editor_mechanism is not None:
+        st.components.v1.html(mechanism_player_html(editor_mechanism, show_length_error, show_stab_lengths, show_stab_angles), height=600)
    
     if st.button("Simulation starten", key="start_simulation_tab0"):
-        mechanism = Mechanism(gelenke, staebe, radius)
-        anim_html = animate_mechanism(mechanism, show_length_error, show_stab_lengths, show_stab_angles)[0]
-        st.components.v1.html(anim_html, height=600)
+        mechanism = editor_mechanism
+        if mechanism is None:
+            st.error(editor_fehler)
+        elif vector_animation:
+            anim_html = mechanism_player_html(mechanism, show_length_error, show_stab_lengths, show_stab_angles)
+        else:
+            anim_html = animate_mechanism(mechanism, show_length_error, show_stab_lengths, show_stab_angles)[0]
+        if mechanism is not None:
+            st.components.v1.html(anim_html, height=600)
 
 ####################################################################################################################
 
 
 with selected_tab[1]:
     st.header("Mechanismus laden")
-    saved_mechanisms = [m["name"] for m in mechanisms_table.all()]
+    saved_mechanisms = list_mechanism_names()
     selected_mechanism = st.selectbox("🔽 Wähle einen gespeicherten Mechanismus", saved_mechanisms)
 
     if st.button("📂 Laden"):
         result = load_mechanism_from_db(selected_mechanism)
         if result is not None:
             st.session_state["mechanism"] = result
+            # Simulation schon im Hintergrund anstoßen, während die Tabellen angezeigt werden
+            result.solve(im_hintergrund=True)
             st.success(f"✅ Mechanismus '{selected_mechanism}' geladen!")
 
             gelenk_data = pd.DataFrame({
@@ -184,8 +266,8 @@ with selected_tab[1]:
 
             stab_data = pd.DataFrame({
                 "Stab": [f"S{i}" for i in range(len(result.staebe))],
-                "Gelenk 1": [result.gelenke.index(stab.gelenk1) for stab in result.staebe],
-                "Gelenk 2": [result.gelenke.index(stab.gelenk2) for stab in result.staebe]
+                "Gelenk 1": result.i_idx,
+                "Gelenk 2": result.j_idx
             })
             st.subheader("Stab-Daten")
             st.dataframe(stab_data)
@@ -203,6 +285,7 @@ with selected_tab[1]:
     show_length_error = st.toggle("Prozentualen Längenfehler anzeigen", key="show_length_error_tab1")
     show_stab_lengths = st.toggle("Längen der Stäbe anzeigen", key="show_stab_lengths_tab1")
     show_stab_angles = st.toggle("Winkel zwischen den Stäben anzeigen", key="show_stab_angles_tab1")
+    vector_animation = st.toggle("Schnelle Vektor-Animation im Browser", value=True, key="vector_animation_tab1")
 
     if show_length_error and show_stab_lengths:
         st.warning("Warnung: Wenn sowohl 'Prozentualen Längenfehler anzeigen' als auch 'Längen der Stäbe anzeigen' aktiviert sind, können sich die Zahlen in der Visualisierung überlappen.")
@@ -210,7 +293,10 @@ with selected_tab[1]:
     if st.session_state["mechanism"] and st.button("▶ Mechanismus ausführen", key="run_loaded_mechanism_tab1"):
         mechanism = st.session_state["mechanism"]
         st.success(f"✅ Mechanismus '{selected_mechanism}' wird gestartet!")
-        anim_html = animate_mechanism(mechanism, show_length_error, show_stab_lengths, show_stab_angles)[0]
+        if vector_animation:
+            anim_html = mechanism_player_html(mechanism, show_length_error, show_stab_lengths, show_stab_angles)
+        else:
+            anim_html = animate_mechanism(mechanism, show_length_error, show_stab_lengths, show_stab_angles)[0]
         st.components.v1.html(anim_html, height=600)
     
 
@@ -218,7 +304,7 @@ with selected_tab[1]:
 
 with selected_tab[2]:  
     st.header("CSV exportieren")
-    saved_mechanisms = [m["name"] for m in mechanisms_table.all()]
+    saved_mechanisms = list_mechanism_names()
     selected_mechanism = st.selectbox("🔽 Wähle einen gespeicherten Mechanismus", saved_mechanisms, key="saved_mechanism_tab0")
 
     if st.button("📂 Laden", key="laden_tab2"):
@@ -241,8 +327,8 @@ with selected_tab[2]:
 
             stab_data = pd.DataFrame({
                 "Stab": [f"S{i}" for i in range(len(mechanism.staebe))],
-                "Gelenk 1": [mechanism.gelenke.index(stab.gelenk1) for stab in mechanism.staebe],
-                "Gelenk 2": [mechanism.gelenke.index(stab.gelenk2) for stab in mechanism.staebe]
+                "Gelenk 1": mechanism.i_idx,
+                "Gelenk 2": mechanism.j_idx
             })
             st.subheader("Stab-Daten")
             st.dataframe(stab_data)
@@ -255,53 +341,26 @@ with selected_tab[2]:
         else:
             st.info("Hinweis: Es werden die Trajektorien aller Gelenke exportiert.")
 
+        col_format, col_winkel = st.columns(2)
+        with col_format:
+            export_format = st.selectbox("Format", verfuegbare_formate(), key="trajectory_export_format")
+        with col_winkel:
+            num_winkel = st.number_input("Anzahl Kurbelwinkel", min_value=2, max_value=1_000_000, value=50, step=50, key="trajectory_export_winkel")
+        export_adaptiv = st.checkbox("Aus adaptiver Abtastung interpolieren (schneller bei vielen Winkeln)", key="trajectory_export_adaptiv")
+
         if st.button("CSV exportieren"):
             mechanism = st.session_state["mechanism"]
-            theta_values = np.linspace(0, 2 * np.pi, 50)
-            positions_over_time = [mechanism.update_positions(theta) for theta in theta_values]
-
-            if export_option:
-                tracked_positions = {i: [] for i, gelenk in enumerate(mechanism.gelenke) if gelenk.is_tracked}
-                for theta, positions in zip(theta_values, positions_over_time):
-                    for i, gelenk in enumerate(mechanism.gelenke):
-                        if gelenk.is_tracked:
-                            tracked_positions[i].append((theta, positions[i]))
-
-                data = []
-                for theta, positions in zip(theta_values, positions_over_time):
-                    row = [round(np.degrees(theta), 2)]
-                    for i, pos in enumerate(positions):
-                        if i in tracked_positions:
-                            row.extend([round(pos[0], 2), round(pos[1], 2)])
-                    data.append(row)
-
-                columns = ["Theta (Grad)"]
-                for i in range(len(mechanism.gelenke)):
-                    if i in tracked_positions:
-                        columns.extend([f"X{i}", f"Y{i}"])
-
-                df = pd.DataFrame(data, columns=columns)
-
-            else:
-                data = []
-                for theta, positions in zip(theta_values, positions_over_time):
-                    row = [round(np.degrees(theta), 2)]
-                    for pos in positions:
-                        row.extend([round(pos[0], 2), round(pos[1], 2)])
-                    data.append(row)
-
-                columns = ["Theta (Grad)"]
-                for i in range(len(mechanism.gelenke)):
-                    columns.extend([f"X{i}", f"Y{i}"])
-
-                df = pd.DataFrame(data, columns=columns)
-
-            csv = df.to_csv(index=False).encode('utf-8')
+            # Blockweise über eine temporäre Datei erzeugen; der Download-Button braucht den Inhalt danach als Bytes
+            with tempfile.TemporaryFile() as datei:
+                schreibe_trajektorie(datei, mechanism, export_format, int(num_winkel), export_option, adaptiv=export_adaptiv)
+                datei.seek(0)
+                daten = datei.read()
+            file_name, mime = FORMATE[export_format]
             st.download_button(
-                label="📥 CSV herunterladen",
-                data=csv,
-                file_name="trajektorie.csv",
-                mime="text/csv"
+                label="📥 CSV herunterladen" if export_format == "csv" else f"📥 {export_format.upper()} herunterladen",
+                data=daten,
+                file_name=file_name,
+                mime=mime
             )
 
 
@@ -315,32 +374,12 @@ with selected_tab[3]:
     col1, col2 = st.columns([0.6, 0.4])
         
     with col1:
-        selected_mechanism = st.selectbox("🔽 Wähle einen gespeicherten Mechanismus zum Export", [m["name"] for m in mechanisms_table.all()], key="export_mechanism")
+        selected_mechanism = st.selectbox("🔽 Wähle einen gespeicherten Mechanismus zum Export", list_mechanism_names(), key="export_mechanism")
 
-        mechanism = load_mechanism_from_db(selected_mechanism)
-        if mechanism is not None:
-            gelenke, staebe, radius = mechanism.gelenke, mechanism.staebe, mechanism.radius
-
-            mechanism_data = {
-                "mechanisms": {
-                    "1": {
-                        "name": selected_mechanism,
-                        "gelenke": [
-                            {
-                                "x": g.x,
-                                "y": g.y,
-                                "static": g.is_static,      
-                                "rotating": g.is_rotating, 
-                                "tracked": g.is_tracked     
-                            } for g in gelenke
-                        ],
-                        "staebe": [[gelenke.index(s.gelenk1), gelenke.index(s.gelenk2)] for s in staebe],
-                        "radius": radius
-                    }
-                }
-            }
-
-            json_data = json.dumps(mechanism_data, indent=4)
+        export_record_data = get_mechanism_record(selected_mechanism) if selected_mechanism else None
+        if export_record_data is not None:
+            export_key = (selected_mechanism, export_record_data["id"], export_record_data["revision"])
+            json_data = export_json(*export_key)
             st.download_button(
                 label="📥 JSON herunterladen",
                 data=json_data,
@@ -349,27 +388,13 @@ with selected_tab[3]:
             )
 
         if st.button("🗑️ Mechanismus aus Datenbank löschen"):
-            mechanisms_table.remove(Query().name == selected_mechanism)
+            delete_mechanism_from_db(selected_mechanism)
             st.success(f"✅ Mechanismus '{selected_mechanism}' wurde aus der Datenbank gelöscht!")
 
 
     with col2:
-        if mechanism is not None:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=2,
-                border=4,
-            )
-            qr.add_data(json_data)
-            qr.make(fit=True)
-            img = qr.make_image(fill='black', back_color='white')
-
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
-
+        if export_record_data is not None:
+            img_base64 = export_qr_base64(*export_key)
             st.image(f"data:image/png;base64,{img_base64}", caption="QR-Code für Mechanismus")
 
         
@@ -406,6 +431,7 @@ with selected_tab[3]:
             show_length_error = st.toggle("Prozentualen Längenfehler anzeigen", key="show_length_error_tab3")
             show_stab_lengths = st.toggle("Längen der Stäbe anzeigen", key="show_stab_lengths_tab3")
             show_stab_angles = st.toggle("Winkel zwischen den Stäben anzeigen", key="show_stab_angles_tab3")
+            vector_animation = st.toggle("Schnelle Vektor-Animation im Browser", value=True, key="vector_animation_tab3")
 
             if show_length_error and show_stab_lengths:
                 st.warning("Warnung: Wenn sowohl 'Prozentualen Längenfehler anzeigen' als auch 'Längen der Stäbe anzeigen' aktiviert sind, können sich die Zahlen in der Visualisierung überlappen.")
@@ -415,12 +441,15 @@ with selected_tab[3]:
                 mechanism = st.session_state["mechanism"]
                 st.success(f"✅ Mechanismus '{selected_mechanism}' wird gestartet!")
                 
-                anim_html = animate_mechanism(mechanism, show_length_error, show_stab_lengths, show_stab_angles)[0]
+                if vector_animation:
+                    anim_html = mechanism_player_html(mechanism, show_length_error, show_stab_lengths, show_stab_angles)
+                else:
+                    anim_html = animate_mechanism(mechanism, show_length_error, show_stab_lengths, show_stab_angles)[0]
                 st.components.v1.html(anim_html, height=600)
 
             # Option zum Speichern des Mechanismus nach dem Laden
             if st.button("💾 Mechanismus in Datenbank speichern"):
-                if not mechanisms_table.search(Query().name == mechanism_info['name']):
+                if not mechanism_exists(mechanism_info['name']):
                     save_mechanism_to_db(mechanism_info['name'], gelenke, staebe, radius)
                     st.success(f"✅ Mechanismus '{mechanism_info['name']}' wurde erfolgreich in der Datenbank gespeichert!")
                 else:
@@ -433,7 +462,7 @@ with selected_tab[3]:
 
 with selected_tab[4]:
     st.header("Mechanismusanimation (gif) downloaden")
-    saved_mechanisms = [m["name"] for m in mechanisms_table.all()]
+    saved_mechanisms = list_mechanism_names()
     selected_mechanism = st.selectbox("🔽 Wähle einen gespeicherten Mechanismus", saved_mechanisms, key="mechanism_tab3")
 
     if "show_length_error_tab4" not in st.session_state:
@@ -450,25 +479,24 @@ with selected_tab[4]:
     if show_length_error and show_stab_lengths:
         st.warning("Warnung: Wenn sowohl 'Prozentualen Längenfehler anzeigen' als auch 'Längen der Stäbe anzeigen' aktiviert sind, können sich die Zahlen in der Visualisierung überlappen.")
    
+    formate = ["gif"] + (["mp4", "webm"] if ffmpeg_available() else [])
+    export_format = st.selectbox("Format", formate, key="export_format_tab4")
+
     if st.button("📂 Laden", key="laden_tab3"):
         mechanism = load_mechanism_from_db(selected_mechanism)
         if mechanism is not None:
             st.session_state["mechanism"] = mechanism
             st.success(f"✅ Mechanismus '{selected_mechanism}' wurde geladen und wird nun für den Download vorbereitet!")
             
-            ani = animate_mechanism(mechanism, show_length_error, show_stab_lengths, show_stab_angles)[1]
-            # Speichern vom GIF
-            with tempfile.NamedTemporaryFile(suffix=".gif", delete=False) as temp_gif:
-                ani.save(temp_gif.name, writer=PillowWriter(fps=10))
-                with open(temp_gif.name, "rb") as f:
-                    gif_bytes = f.read()
+            # Rendern direkt aus der gelösten Trajektorientabelle in einen Speicherpuffer
+            animation_bytes = mechanism_animation_bytes(mechanism, export_format, 10, 50, show_length_error, show_stab_lengths, show_stab_angles)
 
             st.success("✅ Animation zum Download bereit.")
             st.download_button(
-                label="📥 Download als GIF",
-                data=gif_bytes,
-                file_name=f"{selected_mechanism}.gif",
-                mime="image/gif"
+                label=f"📥 Download als {export_format.upper()}",
+                data=animation_bytes,
+                file_name=f"{selected_mechanism}.{export_format}",
+                mime="image/gif" if export_format == "gif" else f"video/{export_format}"
             )
 
 ####################################################################################################################
@@ -477,7 +505,7 @@ with selected_tab[5]:
     st.header("Stückliste erstellen")
 
     # Mechanismus Laden Feld hinzufügen
-    saved_mechanisms = [m["name"] for m in mechanisms_table.all()]
+    saved_mechanisms = list_mechanism_names()
     selected_mechanism_name = st.selectbox(
         "🔽 Wähle einen gespeicherten Mechanismus",
         saved_mechanisms,
@@ -557,12 +585,14 @@ with selected_tab[5]:
 with selected_tab[6]:
     st.header("Geschwindigkeiten des Mechanismus")
 
-    selected_mechanism = st.selectbox("Mechanismus auswählen", [m["name"] for m in mechanisms_table.all()], key="mechanism_tab6")
+    selected_mechanism = st.selectbox("Mechanismus auswählen", list_mechanism_names(), key="mechanism_tab6")
     
     if st.button("📂 Laden", key="load_mechanism_tab6"):
         result = load_mechanism_from_db(selected_mechanism)
         if result is not None:
             st.session_state["mechanism"] = result
+            # Simulation schon im Hintergrund anstoßen, während die Tabellen angezeigt werden
+            result.solve(im_hintergrund=True)
             st.success(f"✅ Mechanismus '{selected_mechanism}' geladen!")
 
             gelenk_data = pd.DataFrame({
@@ -576,8 +606,8 @@ with selected_tab[6]:
 
             stab_data = pd.DataFrame({
                 "Stab": [f"S{i}" for i in range(len(result.staebe))],
-                "Gelenk 1": [result.gelenke.index(stab.gelenk1) for stab in result.staebe],
-                "Gelenk 2": [result.gelenke.index(stab.gelenk2) for stab in result.staebe]
+                "Gelenk 1": result.i_idx,
+                "Gelenk 2": result.j_idx
             })
 
             gelenke = [Gelenk(row["X-Koordinate"], row["Y-Koordinate"], row["Fixiert"], row["Rotierend"], row["Trajektorie"]) for _, row in gelenk_data.iterrows()]
@@ -608,10 +638,13 @@ with selected_tab[6]:
             # Animation der Gelenkgeschwindigkeiten
             num_frames = 50
             time_values = np.linspace(0, 2 * np.pi, num_frames)
-            positions = [mechanism.update_positions(theta * speed / 50) for theta in time_values]
-            positions = np.array(positions)
-            velocities = np.gradient(positions, axis=0)
+            # Kurbel dreht mit speed / 50 rad/s; Geschwindigkeiten analytisch aus der Jacobi-Matrix statt per Differenzenquotient
+            winkelgeschwindigkeit = speed / 50
+            theta_values = time_values * winkelgeschwindigkeit
+            positions = mechanism.solve_angles(theta_values)
+            velocities, accelerations = mechanism.kinematik(theta_values, positions, winkelgeschwindigkeit)
             velocity_magnitudes = np.linalg.norm(velocities, axis=2)
+            acceleration_magnitudes = np.linalg.norm(accelerations, axis=2)
             
             if selected_gelenke:
                 indices = [int(g.strip("G")) for g in selected_gelenke]
@@ -638,15 +671,8 @@ with selected_tab[6]:
                 for i in indices:
                     lines[i].set_data(time_values[:frame], velocity_magnitudes[:frame, i])
                 return list(lines.values())
-            anim = FuncAnimation(fig, update, frames=num_frames, interval=1000/fps, blit=True)
-            import tempfile, os
-            with tempfile.NamedTemporaryFile(suffix=".gif", delete=False) as tmp:
-                tmp_filename = tmp.name
-            writer = PillowWriter(fps=fps)
-            anim.save(tmp_filename, writer=writer)
-            with open(tmp_filename, "rb") as f:
-                gif_bytes = f.read()
-            os.remove(tmp_filename)
+            gif_bytes = encode_gif(render_frames(fig, update, list(range(num_frames))), fps)
+            plt.close(fig)
             
             #Liste mit Geschwindigkeiten
             max_speed_positions = {}
@@ -655,7 +681,8 @@ with selected_tab[6]:
                 max_speed_positions[f"Gelenk {i+1}"] = {
                     "X-Position": positions[max_index, i, 0],
                     "Y-Position": positions[max_index, i, 1],
-                    "Maximale Geschwindigkeit": velocity_magnitudes[max_index, i]
+                    "Maximale Geschwindigkeit": velocity_magnitudes[max_index, i],
+                    "Maximale Beschleunigung": np.max(acceleration_magnitudes[:, i])
                 }
             
             st.subheader("Positionen der maximalen Geschwindigkeit der ausgewählten Gelenke")
@@ -665,6 +692,148 @@ with selected_tab[6]:
             
             st.image(gif_bytes)
             
-            anim_html_loaded = animate_mechanism(mechanism, False, False, False)[0]
+            anim_html_loaded = mechanism_player_html(mechanism)
             st.components.v1.html(anim_html_loaded, height=600)
-            
\ No newline at end of file
+            
+
+####################################################################################################################
+
+with selected_tab[7]:
+    st.header("Solver-Diagnose")
+
+    selected_mechanism = st.selectbox("Mechanismus auswählen", list_mechanism_names(), key="mechanism_tab7")
+    col1, col2 = st.columns(2)
+    with col1:
+        diagnose_aufloesung = st.number_input("Anzahl Kurbelwinkel", min_value=2, max_value=100_000, value=72, key="diagnose_aufloesung")
+    with col2:
+        diagnose_profil = st.toggle("Mit cProfile messen", value=False, key="diagnose_profil")
+
+    if st.button("Diagnose starten", key="diagnose_tab7"):
+        mechanism = load_mechanism_from_db(selected_mechanism)
+        if mechanism is not None:
+            bericht = diagnose_solve(mechanism, int(diagnose_aufloesung), diagnose_profil)
+            zusammenfassung = bericht["zusammenfassung"]
+
+            spalten = st.columns(5)
+            spalten[0].metric("Gesamtzeit", f"{bericht['gesamtzeit'] * 1000:.1f} ms")
+            spalten[1].metric("Gelöste Winkel", zusammenfassung["winkel"])
+            spalten[2].metric("Nicht konvergiert", zusammenfassung["nicht_konvergiert"])
+            spalten[3].metric("Zweigwechsel", zusammenfassung["zweigwechsel"])
+            spalten[4].metric("Max. Residuum", f"{zusammenfassung['residuum_max']:.2e}")
+
+            st.subheader("Zeit je Verfahren")
+            st.dataframe(pd.DataFrame(zusammenfassung["verfahren"]).T)
+
+            tabelle = metriken_tabelle(mechanism.metriken.as_array())
+            st.subheader("Iterationen und Residuum je Winkel")
+            st.line_chart(tabelle.groupby("theta_grad")[["iterationen", "auswertungen"]].max())
+            st.line_chart(tabelle.groupby("theta_grad")[["residuum"]].max())
+
+            if bericht["problemwinkel"]:
+                st.subheader("Auffällige Winkel")
+                st.dataframe(pd.DataFrame(bericht["problemwinkel"]))
+            else:
+                st.success("✅ Alle Winkel konvergiert, keine Zweigwechsel.")
+
+            abtastung = bericht["abtastung"]
+            st.subheader("Adaptive Abtastung")
+            spalten = st.columns(4)
+            spalten[0].metric("Lösungen", abtastung["loesungen"])
+            spalten[1].metric("Stützstellen", abtastung["stuetzstellen"])
+            spalten[2].metric("Totlagen", len(abtastung["totlagen_grad"]))
+            spalten[3].metric("Zweigsprünge", len(abtastung["zweigspruenge_grad"]))
+            if abtastung["totlagen_grad"]:
+                st.warning("Totlagen bei " + ", ".join(f"{w:.2f}°" for w in abtastung["totlagen_grad"]))
+            if abtastung["zweigspruenge_grad"]:
+                st.error("Zweigsprünge bei " + ", ".join(f"{w:.2f}°" for w in abtastung["zweigspruenge_grad"]))
+
+            if bericht["profil"]:
+                st.subheader("cProfile")
+                st.code(bericht["profil"])
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("📥 Bericht als JSON", bericht_json(bericht), file_name=f"{selected_mechanism}_diagnose.json", mime="application/json")
+            with col2:
+                st.download_button("📥 Messwerte als CSV", metriken_csv(mechanism.metriken.as_array()), file_name=f"{selected_mechanism}_metriken.csv", mime="text/csv")
+
+
+####################################################################################################################
+
+with selected_tab[8]:
+    st.header("Maßsynthese")
+    st.info("Optimiert die Koordinaten der freien Gelenke und den Kurbelradius, sodass die Bahn des Trajektorien-Gelenks dem Zielpfad folgt. Topologie, Fest- und Drehgelenk bleiben unverändert.")
+
+    selected_mechanism = st.selectbox("Ausgangsmechanismus", list_mechanism_names(), key="mechanism_tab8")
+    start_record = get_mechanism_record(selected_mechanism) if selected_mechanism else None
+
+    if start_record is not None:
+        zielpunkte, ausgangsbahn, standard_spanne = synthese_vorgaben(selected_mechanism, start_record["id"], start_record["revision"])
+        # Zielpfad: hochgeladene CSV oder editierbare Punkte, vorbelegt mit der aktuellen Bahn
+        ziel_datei = st.file_uploader("Zielpfad als CSV (Spalten x, y)", type=["csv"], key="zielpfad_csv")
+        if ziel_datei is not None:
+            try:
+                zielpfad = lade_zielpfad(ziel_datei)
+            except ValueError as e:
+                st.error(f"Fehler beim Laden des Zielpfads: {e}")
+                zielpfad = None
+        else:
+            ziel_df = st.data_editor(pd.DataFrame({"x": zielpunkte[:, 0], "y": zielpunkte[:, 1]}), num_rows="dynamic", key=f"zielpfad_{selected_mechanism}")
+            zielpfad = ziel_df[["x", "y"]].dropna().to_numpy(dtype=float)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            max_generationen = st.number_input("Generationen", min_value=1, max_value=2000, value=50, key="synthese_generationen")
+        with col2:
+            population = st.number_input("Populationsfaktor", min_value=2, max_value=50, value=10, key="synthese_population")
+        with col3:
+            spanne = st.number_input("Suchbereich je Koordinate (±)", min_value=0.1, value=standard_spanne, key="synthese_spanne")
+
+        if zielpfad is not None and len(zielpfad) >= 3 and st.button("Synthese starten", key="synthese_tab8"):
+            fortschritt_balken = st.progress(0.0)
+
+            def fortschritt(generation, gesamt, kosten):
+                fortschritt_balken.progress(min(generation / gesamt, 1.0), text=f"Generation {generation}/{gesamt}, Abweichung {kosten:.4g}")
+
+            with st.spinner("Synthese läuft..."):
+                st.session_state["synthese"] = synthesize(load_mechanism_from_db(selected_mechanism), zielpfad, max_generationen=int(max_generationen),
+                                                          population=int(population), spanne=spanne, fortschritt=fortschritt)
+            st.session_state["synthese_ziel"] = zielpfad
+            st.session_state["synthese_start"] = selected_mechanism
+            st.session_state["synthese_ausgangsbahn"] = ausgangsbahn
+
+    synthese = st.session_state.get("synthese")
+    if synthese is not None and st.session_state.get("synthese_start") == selected_mechanism:
+        ergebnis_mechanism = synthese["mechanism"]
+        k = synthese["gelenk_index"]
+
+        spalten = st.columns(4)
+        spalten[0].metric("Abweichung vorher", f"{synthese['kosten_start']:.4g}")
+        spalten[1].metric("Abweichung nachher", f"{synthese['kosten']:.4g}")
+        spalten[2].metric("Auswertungen", synthese["auswertungen"])
+        spalten[3].metric("Cache-Treffer", synthese["cache_treffer"])
+
+        fig, ax = plt.subplots()
+        ziel = st.session_state["synthese_ziel"]
+        ax.plot(*np.vstack([ziel, ziel[:1]]).T, "k--o", markersize=3, label="Zielpfad")
+        ax.plot(*st.session_state["synthese_ausgangsbahn"].T, color="gray", label="Ausgangsbahn")
+        ax.plot(*ergebnis_mechanism.trajectory_table()[:, k].T, color="tab:red", label="Optimierte Bahn")
+        ax.set_aspect("equal")
+        ax.legend()
+        st.pyplot(fig)
+        plt.close(fig)
+
+        st.dataframe(pd.DataFrame({
+            "Gelenk": [f"G{i}" for i in range(len(ergebnis_mechanism.gelenke))],
+            "X-Koordinate": ergebnis_mechanism.koordinaten[:, 0],
+            "Y-Koordinate": ergebnis_mechanism.koordinaten[:, 1],
+        }))
+        st.write(f"Kurbelradius: {ergebnis_mechanism.radius:.4f}")
+
+        synthese_name = st.text_input("Name für den optimierten Mechanismus", value=f"{selected_mechanism} (optimiert)", key="synthese_name")
+        if st.button("💾 Optimierten Mechanismus speichern", key="synthese_speichern"):
+            if mechanism_exists(synthese_name):
+                st.warning(f"⚠️ Mechanismus '{synthese_name}' existiert bereits in der Datenbank!")
+            else:
+                save_mechanism_to_db(synthese_name, ergebnis_mechanism.gelenke, ergebnis_mechanism.staebe, ergebnis_mechanism.radius)
+                st.success(f"✅ Mechanismus '{synthese_name}' gespeichert!")
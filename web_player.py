@@ -0,0 +1,147 @@
+import base64
+import json
+import numpy as np
+
+PLAYER_TEMPLATE = """
+<div style="font-family: sans-serif; font-size: 13px;">
+  <canvas id="mechanism_canvas" width="600" height="480" style="border: 1px solid #ddd;"></canvas>
+  <div style="margin-top: 6px; display: flex; gap: 12px; align-items: center; flex-wrap: wrap;">
+    <button id="play_button">⏸</button>
+    <label>Frame <input id="frame_slider" type="range" min="0" step="0.01" value="0"></label>
+    <label>FPS <input id="fps_slider" type="range" min="1" max="60" value="__FPS__"> <span id="fps_value">__FPS__</span></label>
+    <label>Größe
+      <select id="size_select">
+        <option value="400x320">400 × 320</option>
+        <option value="600x480" selected>600 × 480</option>
+        <option value="800x640">800 × 640</option>
+        <option value="1000x800">1000 × 800</option>
+      </select>
+    </label>
+    <label><input id="smooth_check" type="checkbox" checked> Zwischenbilder</label>
+  </div>
+</div>
+<script>
+(function() {
+  const data = __DATA__;
+  const bytes = Uint8Array.from(atob(data.positions), c => c.charCodeAt(0));
+  const pos = new Float32Array(bytes.buffer);
+  const F = data.frames, N = data.joints;
+  const canvas = document.getElementById("mechanism_canvas");
+  const ctx = canvas.getContext("2d");
+  const slider = document.getElementById("frame_slider");
+  const fpsSlider = document.getElementById("fps_slider");
+  slider.max = F;
+
+  let playing = true, t = 0, last = null;
+
+  function point(f, k) { const o = (f * N + k) * 2; return [pos[o], pos[o + 1]]; }
+  function at(time, k) {
+    const f0 = Math.floor(time) % F, f1 = (f0 + 1) % F;
+    const w = document.getElementById("smooth_check").checked ? time - Math.floor(time) : 0;
+    const a = point(f0, k), b = point(f1, k);
+    return [a[0] + (b[0] - a[0]) * w, a[1] + (b[1] - a[1]) * w];
+  }
+
+  function draw() {
+    const W = canvas.width, H = canvas.height;
+    const b = data.bounds, span = Math.max(b[2] - b[0], b[3] - b[1]);
+    const scale = Math.min(W, H) / span;
+    const cx = (b[0] + b[2]) / 2, cy = (b[1] + b[3]) / 2;
+    const X = x => W / 2 + (x - cx) * scale, Y = y => H / 2 - (y - cy) * scale;
+
+    ctx.clearRect(0, 0, W, H);
+    ctx.strokeStyle = "#eee"; ctx.lineWidth = 1;
+    const step = Math.pow(10, Math.floor(Math.log10(span / 2)));
+    for (let g = Math.ceil((cx - span) / step) * step; g < cx + span; g += step) {
+      ctx.beginPath(); ctx.moveTo(X(g), 0); ctx.lineTo(X(g), H); ctx.stroke();
+      ctx.beginPath(); ctx.moveTo(0, Y(g)); ctx.lineTo(W, Y(g)); ctx.stroke();
+    }
+
+    ctx.setLineDash([5, 4]); ctx.strokeStyle = "blue";
+    ctx.beginPath(); ctx.arc(X(data.circle[0]), Y(data.circle[1]), data.circle[2] * scale, 0, 2 * Math.PI); ctx.stroke();
+    ctx.setLineDash([]);
+
+    const P = [];
+    for (let k = 0; k < N; k++) P.push(at(t, k));
+
+    ctx.strokeStyle = "green"; ctx.lineWidth = 2;
+    for (const k of data.tracked) {
+      ctx.beginPath();
+      for (let f = 0; f <= Math.floor(t) % F; f++) { const p = point(f, k); f === 0 ? ctx.moveTo(X(p[0]), Y(p[1])) : ctx.lineTo(X(p[0]), Y(p[1])); }
+      ctx.lineTo(X(P[k][0]), Y(P[k][1]));
+      ctx.stroke();
+    }
+
+    ctx.strokeStyle = "black";
+    ctx.font = "11px sans-serif"; ctx.textAlign = "center";
+    data.bars.forEach(([i, j], s) => {
+      ctx.beginPath(); ctx.moveTo(X(P[i][0]), Y(P[i][1])); ctx.lineTo(X(P[j][0]), Y(P[j][1])); ctx.stroke();
+      const mx = X((P[i][0] + P[j][0]) / 2), my = Y((P[i][1] + P[j][1]) / 2);
+      const len = Math.hypot(P[i][0] - P[j][0], P[i][1] - P[j][1]);
+      if (data.show_length_error) { ctx.fillStyle = "red"; ctx.fillText(((len - data.lengths[s]) / data.lengths[s] * 100).toFixed(2) + "%", mx, my); }
+      if (data.show_stab_lengths) { ctx.fillStyle = "blue"; ctx.fillText(len.toFixed(2), mx, my); }
+    });
+
+    ctx.fillStyle = "red";
+    for (const p of P) { ctx.beginPath(); ctx.arc(X(p[0]), Y(p[1]), 4, 0, 2 * Math.PI); ctx.fill(); }
+
+    if (data.show_stab_angles) {
+      ctx.fillStyle = "green";
+      data.angles.forEach(([a, k, c], idx) => {
+        const v1 = [P[a][0] - P[k][0], P[a][1] - P[k][1]], v2 = [P[c][0] - P[k][0], P[c][1] - P[k][1]];
+        const n = Math.hypot(...v1) * Math.hypot(...v2);
+        const angle = n === 0 ? 0 : Math.acos(Math.max(-1, Math.min(1, (v1[0] * v2[0] + v1[1] * v2[1]) / n))) * 180 / Math.PI;
+        const sign = idx % 2 === 0 ? 1 : -1;
+        const ox = sign * 1.7 * Math.cos(angle * Math.PI / 180), oy = sign * 1.7 * Math.sin(angle * Math.PI / 180);
+        ctx.fillText(angle.toFixed(1) + "°", X(P[k][0] + ox), Y(P[k][1] + oy));
+      });
+    }
+  }
+
+  function tick(now) {
+    if (playing && last !== null) {
+      t = (t + (now - last) / 1000 * Number(fpsSlider.value)) % F;
+      slider.value = t;
+    }
+    last = now;
+    draw();
+    requestAnimationFrame(tick);
+  }
+
+  document.getElementById("play_button").onclick = e => { playing = !playing; e.target.textContent = playing ? "⏸" : "▶"; };
+  slider.oninput = () => { t = Number(slider.value) % F; draw(); };
+  fpsSlider.oninput = () => { document.getElementById("fps_value").textContent = fpsSlider.value; };
+  document.getElementById("size_select").onchange = e => { const [w, h] = e.target.value.split("x"); canvas.width = w; canvas.height = h; draw(); };
+  requestAnimationFrame(tick);
+})();
+</script>
+"""
+
+def mechanism_player_html(mechanism, show_length_error=False, show_stab_lengths=False, show_stab_angles=False, aufloesung=None, fps=10):
+    # Nur Koordinaten (Float32, base64) und Topologie gehen an den Browser, gezeichnet wird clientseitig im Canvas
+    tabelle = mechanism.trajectory_table(aufloesung)[:-1]
+    mittelpunkt = mechanism.koordinaten[mechanism.rotating_gelenk_index]
+    padding = 10
+    all_x = np.concatenate([mechanism.koordinaten[:, 0], tabelle[:, :, 0].ravel()])
+    all_y = np.concatenate([mechanism.koordinaten[:, 1], tabelle[:, :, 1].ravel()])
+
+    nachbarn = [[] for _ in mechanism.gelenke]
+    for i, j in zip(mechanism.i_idx, mechanism.j_idx):
+        nachbarn[i].append(int(j))
+        nachbarn[j].append(int(i))
+
+    data = {
+        "frames": len(tabelle),
+        "joints": len(mechanism.gelenke),
+        "positions": base64.b64encode(np.ascontiguousarray(tabelle, dtype=np.float32).tobytes()).decode(),
+        "bars": [[int(i), int(j)] for i, j in zip(mechanism.i_idx, mechanism.j_idx)],
+        "lengths": np.round(mechanism.start_laengen, 6).tolist(),
+        "angles": [[a, k, b] for k, n in enumerate(nachbarn) for a, b in zip(n[:-1], n[1:])],
+        "tracked": [i for i, g in enumerate(mechanism.gelenke) if g.is_tracked],
+        "circle": [float(mittelpunkt[0]), float(mittelpunkt[1]), float(mechanism.radius)],
+        "bounds": [float(all_x.min() - padding), float(all_y.min() - padding), float(all_x.max() + padding), float(all_y.max() + padding)],
+        "show_length_error": bool(show_length_error),
+        "show_stab_lengths": bool(show_stab_lengths),
+        "show_stab_angles": bool(show_stab_angles),
+    }
+    return PLAYER_TEMPLATE.replace("__DATA__", json.dumps(data, separators=(",", ":"))).replace("__FPS__", str(int(fps)))